@@ -36,9 +36,18 @@ with open("data/abi/syncswap/classic_pool_data.json") as file:
 with open("data/abi/skydrome/abi.json", "r") as file:
     SKYDROME_ROUTER_ABI = json.load(file)
 
+with open("data/abi/skydrome/pair.json", "r") as file:
+    SKYDROME_PAIR_ABI = json.load(file)
+
+with open("data/abi/skydrome/factory.json", "r") as file:
+    SKYDROME_FACTORY_ABI = json.load(file)
+
 with open("data/abi/zebra/abi.json", "r") as file:
     ZEBRA_ROUTER_ABI = json.load(file)
 
+with open("data/abi/zebra/pair.json", "r") as file:
+    ZEBRA_PAIR_ABI = json.load(file)
+
 with open("data/abi/aave/abi.json", "r") as file:
     AAVE_ABI = json.load(file)
 
@@ -81,6 +90,9 @@ with open("data/abi/l2telegraph/bridge_nft.json", "r") as file:
 with open("data/abi/nft-origins/abi.json", "r") as file:
     NFT_ORIGINS_ABI = json.load(file)
 
+with open("data/abi/multicall/abi.json", "r") as file:
+    MULTICALL_ABI = json.load(file)
+
 
 class AutomaticMode:
     def __init__(self, value: bool) -> None:
@@ -105,6 +117,8 @@ BRIDGE_CONTRACTS = {
 
 ORBITER_CONTRACT = "0x80c67432656d59144ceff962e8faf8926599bcf8"
 
+MULTICALL_CONTRACT = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
 SCROLL_TOKENS = {
     "ETH": "0x5300000000000000000000000000000000000004",
     "WETH": "0x5300000000000000000000000000000000000004",
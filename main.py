@@ -13,14 +13,25 @@ from datetime import datetime
 
 from config import OKX_ADDRESSES, WALLETS
 from settings import (
+    ADAPTIVE_CONCURRENCY,
+    ELIGIBILITY_SCAN,
     ENABLE_ERROR_TRACEBACK,
     MAX_SLEEP_BEFORE_ACCOUNT_START,
+    MAX_THREADS,
     MIN_SLEEP_BEFORE_ACCOUNT_START,
+    MIN_THREADS,
+    OKX_PLAN_AHEAD,
+    OKX_PLAN_WITHDRAWALS,
     RANDOM_WALLET,
     THREADS,
 )
 from modules_settings import *
+from utils.concurrency import AdaptiveLimiter, current_limiter
+from utils.bridge_stats import log_bridge_stats
 from utils.gas_checker import check_gas
+from utils.http import close_session
+from utils.okx_client import close_okx_clients
+from utils.rpc import log_rpc_stats
 from utils.sleeping import sleep
 
 
@@ -39,6 +50,7 @@ def get_module():
                 "Bridge Orbiter": bridge_orbiter,
                 "Bridge Layerswap": bridge_layerswap,
                 "Bridge Nitro": bridge_nitro,
+                "Bridge Auto (best quote)": bridge_auto,
                 "Swap on Skydrome": swap_skydrome,
                 "Swap on Zebra": swap_zebra,
                 "Swap on SyncSwap": swap_syncswap,
@@ -80,34 +92,24 @@ async def run_module(module, account_id, key, okx_address):
     await module(account_id, key, okx_address)
 
 
-async def run_group(module, group, group_id, start_id):
-    for i, account in enumerate(group):
-        if start_id != 0:
-            await sleep(
-                account_id=start_id + i + 1,
-                address="",
-                sleep_from=MIN_SLEEP_BEFORE_ACCOUNT_START,
-                sleep_to=MAX_SLEEP_BEFORE_ACCOUNT_START,
-            )
-        try:
-            await run_module(
-                module=module,
-                account_id=start_id + i + 1,
-                key=account[0],
-                okx_address=account[1],
+async def run_account(module, account_id, key, okx_address):
+    try:
+        await run_module(
+            module=module,
+            account_id=account_id,
+            key=key,
+            okx_address=okx_address,
+        )
+    except Exception as e:
+        if ENABLE_ERROR_TRACEBACK:
+            logger.error(
+                f"[account - {account_id}] Error - {e}, Traceback:\n {traceback.format_exc()}"
             )
-        except Exception as e:
-            if ENABLE_ERROR_TRACEBACK:
-                logger.error(
-                    f"[group - {group_id}][account - {start_id + i + 1}] Error - {e}, Traceback:\n {traceback.format_exc()}"
-                )
-            else:
-                logger.error(
-                    f"[group - {group_id}][account - {start_id + i + 1}] Error - {e}"
-                )
+        else:
+            logger.error(f"[account - {account_id}] Error - {e}")
 
 
-def _generate_groups():
+def _prepare_accounts():
     global THREADS
 
     data = list(zip(WALLETS, OKX_ADDRESSES))
@@ -119,42 +121,85 @@ def _generate_groups():
     elif THREADS > len(data):
         THREADS = len(data)
 
-    group_size = len(data) // THREADS
-    remainder = len(data) % THREADS
+    return data
 
-    groups = []
-    start = 0
-    for i in range(THREADS):
-        # Add an extra account to some groups to distribute the remainder
-        end = start + group_size + (1 if i < remainder else 0)
-        groups.append(data[start:end])
-        start = end
 
-    return groups
+async def main(module):
+    accounts = _prepare_accounts()
 
+    if ELIGIBILITY_SCAN and module is automatic:
+        try:
+            await scan_automatic_eligibility([key for key, _ in accounts])
+        except Exception as e:
+            logger.warning(f"Eligibility scan failed, running every step | {e}")
+
+    if ADAPTIVE_CONCURRENCY:
+        limiter = AdaptiveLimiter(THREADS, MIN_THREADS, max(MAX_THREADS, THREADS))
+        controller = asyncio.create_task(limiter.control(), name="concurrency")
+    else:
+        limiter = AdaptiveLimiter(THREADS, THREADS, THREADS)
+        controller = None
+
+    async def run_with_limit(account_id, key, okx_address):
+        # waits on okx, bridges and gas give the slot to other accounts
+        current_limiter.set(limiter)
+        try:
+            await run_account(
+                module=module,
+                account_id=account_id,
+                key=key,
+                okx_address=okx_address,
+            )
+        finally:
+            await limiter.release()
 
-async def main(module):
-    groups = _generate_groups()
+    planned = 0
 
-    start_id = 0
     tasks = []
-    for id, group in enumerate(groups):
+    for i, (key, okx_address) in enumerate(accounts):
+        # pause between starts doesn't hold a slot, running accounts keep all of them
+        if i >= THREADS:
+            await sleep(
+                account_id=i + 1,
+                address="",
+                sleep_from=MIN_SLEEP_BEFORE_ACCOUNT_START,
+                sleep_to=MAX_SLEEP_BEFORE_ACCOUNT_START,
+            )
+
+        await limiter.acquire()
+
+        # funds of the next accounts are on the way while the started ones work
+        while (
+            OKX_PLAN_WITHDRAWALS
+            and module is automatic
+            and planned < min(len(accounts), i + 1 + OKX_PLAN_AHEAD)
+        ):
+            try:
+                plan_okx_withdrawal(planned + 1, accounts[planned][0])
+            except Exception as e:
+                logger.warning(
+                    f"[account - {planned + 1}] OKX withdrawal planning failed, withdrawing when the account starts | {e}"
+                )
+            planned += 1
+
         tasks.append(
             asyncio.create_task(
-                run_group(
-                    module=module,
-                    group=group,
-                    group_id=id,
-                    start_id=start_id,
-                ),
-                name=f"group - {id}",
+                run_with_limit(account_id=i + 1, key=key, okx_address=okx_address),
+                name=f"account - {i + 1}",
             )
         )
 
-        start_id += len(group)
-
     await asyncio.gather(*tasks)
 
+    if controller is not None:
+        controller.cancel()
+
+    await close_session()
+    await close_okx_clients()
+
+    log_rpc_stats()
+    log_bridge_stats()
+
 
 if __name__ == "__main__":
     logger.add(
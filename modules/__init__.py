@@ -7,6 +7,8 @@ from .l2telegraph import L2Telegraph
 from .deploy import Deployer
 from .nftorigins import NftOrigins
 from .nitro import Nitro
+from .bridge_aggregator import BridgeAggregator
+from .swap_aggregator import SwapAggregator
 from .rubyscore import RubyScore
 from .safe import GnosisSafe
 from .scroll import Scroll
@@ -34,6 +36,7 @@ class MODULES_NAMES(str, enum.Enum):
     bridge_orbiter = "bridge_orbiter"
     bridge_layerswap = "bridge_layerswap"
     bridge_nitro = "bridge_nitro"
+    bridge_auto = "bridge_auto"
     swap_syncswap = "swap_syncswap"
     swap_zebra = "swap_zebra"
     swap_xyswap = "swap_xyswap"
@@ -62,6 +65,7 @@ class MODULES_NAMES(str, enum.Enum):
 SWAP_MODULES = {
     MODULES_NAMES.swap_skydrome: {
         "class": Skydrome,
+        "quote": "skydrome",
         "tokens": {
             "ETH": ["USDC", "USDT"],
             "USDC": ["ETH"],
@@ -70,6 +74,7 @@ SWAP_MODULES = {
     },
     MODULES_NAMES.swap_zebra: {
         "class": Zebra,
+        "quote": "zebra",
         "tokens": {
             "ETH": ["USDC", "USDT"],
             "USDC": ["ETH"],
@@ -78,6 +83,7 @@ SWAP_MODULES = {
     },
     MODULES_NAMES.swap_syncswap: {
         "class": SyncSwap,
+        "quote": "syncswap",
         "tokens": {
             "ETH": ["USDC", "USDT"],
             "USDC": ["ETH"],
@@ -86,6 +92,8 @@ SWAP_MODULES = {
     },
     MODULES_NAMES.swap_xyswap: {
         "class": XYSwap,
+        "quote": "xyswap",
+        "service": "xyswap",
         "tokens": {
             "ETH": ["USDC", "WETH"],
             "USDC": ["ETH"],
@@ -93,3 +101,19 @@ SWAP_MODULES = {
         },
     },
 }
+
+# bridges with an external api, automatic mode switches between them when one is down
+BRIDGE_MODULES = {
+    "orbiter": {
+        "class": Orbiter,
+        "chains": ["ethereum", "arbitrum", "optimism", "zksync", "base", "linea"],
+    },
+    "layerswap": {
+        "class": LayerSwap,
+        "chains": ["ethereum", "arbitrum", "optimism", "zksync", "base"],
+    },
+    "nitro": {
+        "class": Nitro,
+        "chains": ["ethereum", "arbitrum", "optimism", "zksync", "base", "linea"],
+    },
+}
@@ -9,16 +9,32 @@ from web3 import AsyncWeb3, Web3
 from eth_account import Account as EthereumAccount
 from web3.contract import Contract
 from web3.exceptions import TransactionNotFound
-from web3.middleware import async_geth_poa_middleware
 
 from config import RPC, ERC20_ABI, SCROLL_TOKENS, SCROLL_FEE_INACCURACY
 from settings import (
+    BROADCAST_TO_ALL_RPC,
     GAS_MULTIPLIER,
     MAX_ALL_AMOUNT_ETH_PERCENT,
     MAX_PRIORITY_FEE,
     MIN_ALL_AMOUNT_ETH_PERCENT,
+    PIPELINE_GAS_LIMIT,
+    PIPELINE_TRANSACTIONS,
+    SIMULATE_TRANSACTIONS,
+    TX_FEE_BUMP_PERCENT,
+    TX_MAX_REPLACEMENTS,
+    TX_REPLACE_AFTER_BLOCKS,
 )
+from utils.bridge_stats import (
+    DEFAULT_BRIDGE_TIMEOUT,
+    get_bridge_timeout,
+    record_latency,
+)
+from utils.bridge_tracker import track, untrack
+from utils.concurrency import parked
 from utils.helpers import retry
+from utils.nonce_manager import get_nonce, mark_sent, reset_nonce
+from utils.rpc import broadcast_raw_transaction, get_web3
+from utils.simulation import explain_estimate_error, explain_failure, simulate
 from utils.sleeping import sleep
 
 
@@ -30,24 +46,38 @@ class Account:
         self.explorer = RPC[chain]["explorer"]
         self.token = RPC[chain]["token"]
 
-        self.w3 = AsyncWeb3(
-            AsyncWeb3.AsyncHTTPProvider(random.choice(RPC[chain]["rpc"])),
-            middlewares=[async_geth_poa_middleware],
-        )
+        self.w3 = get_web3(random.choice(RPC[chain]["rpc"]))
 
         self.account = EthereumAccount.from_key(private_key)
         self.address = self.account.address
 
+        self.signed_transactions = {}
+        self.sent_transactions = {}
+
+    async def get_nonce(self) -> int:
+        return await get_nonce(self.w3, self.chain, self.address)
+
     async def get_tx_data(self, value: int = 0, gas_price: bool = True):
+        reads = [self.w3.eth.chain_id, self.get_nonce()]
+        if gas_price:
+            reads.append(self.w3.eth.gas_price)
+
+        chain_id, nonce, *price = await asyncio.gather(*reads)
+
         tx = {
-            "chainId": await self.w3.eth.chain_id,
+            "chainId": chain_id,
             "from": self.address,
             "value": value,
-            "nonce": await self.w3.eth.get_transaction_count(self.address),
+            "nonce": nonce,
         }
 
         if gas_price:
-            tx.update({"gasPrice": await self.w3.eth.gas_price})
+            tx.update({"gasPrice": price[0]})
+
+        if PIPELINE_TRANSACTIONS:
+            # build_transaction estimates gas against the latest block, where the previous
+            # transaction of this account might not be included yet. Real gas is estimated in sign
+            tx.update({"gas": PIPELINE_GAS_LIMIT})
 
         return tx
 
@@ -118,12 +148,18 @@ class Account:
         max_percent: int = MAX_ALL_AMOUNT_ETH_PERCENT,
         fee_cost_wei: float = 0,
         additinal_fees: Optional[list] = None,
+        amount_wei: Optional[int] = None,
     ):
+        """amount_wei - ETH amount chosen earlier, e.g. the one a bridge was quoted for"""
+
         random_amount = round(random.uniform(min_amount, max_amount), decimal)
 
         if from_token == "ETH":
             balance = await self.w3.eth.get_balance(self.address)
 
+            if amount_wei is not None:
+                return amount_wei, Web3.from_wei(amount_wei, "ether"), balance
+
             if fee_cost_wei:
                 add_fee = 0
                 if additinal_fees is not None:
@@ -204,6 +240,10 @@ class Account:
 
             txn_hash = await self.send_raw_transaction(signed_txn)
 
+            if PIPELINE_TRANSACTIONS:
+                await self.wait_until_tx_accepted(txn_hash.hex())
+                return
+
             await self.wait_until_tx_finished(txn_hash.hex())
 
             await sleep(
@@ -219,10 +259,24 @@ class Account:
         balance_wei: float,
         increase_amount_wei: float,
         chain="scroll",
-        timeout=24 * 60 * 60 + 30,
+        timeout=None,
         fee_inaccuracy=0.0015,
         sleep=60,
+        service: Optional[str] = None,
+        tracking_id: Optional[str] = None,
     ):
+        """
+        service - bridge that sends the funds, its arrival time is recorded
+        tracking_id - swap id or source transaction hash to ask the bridge api about delivery
+        """
+
+        if timeout is None:
+            timeout = (
+                get_bridge_timeout(service, self.chain, chain)
+                if service is not None
+                else DEFAULT_BRIDGE_TIMEOUT
+            )
+
         logger.info(
             f"[{self.account_id}][{self.address}] Waiting for balance increase from {balance_wei / 10 ** 18} to {(balance_wei + increase_amount_wei) / 10 ** 18} on {chain} for {timeout} seconds"
         )
@@ -236,50 +290,188 @@ class Account:
                 chain=chain,
             )
 
-        while True:
-            if time.time() - start_time > timeout:
-                logger.error(
-                    f"[{self.account_id}][{self.address}] Timeout {timeout} seconds reached"
-                )
-                return False
-
-            new_balance = (await account.get_balance())["balance_wei"]
-            if new_balance >= balance_wei + increase_amount_wei - AsyncWeb3.to_wei(
-                fee_inaccuracy, "ether"
-            ):
-                logger.success(
-                    f"[{self.account_id}][{self.address}] Balance increased from {balance_wei / 10 ** 18} to {new_balance / 10 ** 18}"
-                )
-                return True
+        async with parked(f"funds arrive on {chain}", self.account_id, self.address):
+            # bridge api usually confirms delivery earlier, balance is still watched as a fallback
+            delivery = track(service, tracking_id)
 
-            await asyncio.sleep(sleep)
+            try:
+                while True:
+                    if time.time() - start_time > timeout:
+                        logger.error(
+                            f"[{self.account_id}][{self.address}] Timeout {timeout} seconds reached"
+                        )
+                        # the run took at least this long, without it p99 only sees fast runs
+                        if service is not None:
+                            record_latency(service, self.chain, chain, timeout)
+                        return False
+
+                    if delivery is not None and delivery.done():
+                        if not delivery.result():
+                            logger.error(
+                                f"[{self.account_id}][{self.address}] {service} reports bridge {tracking_id} failed"
+                            )
+                            return False
+
+                        logger.success(
+                            f"[{self.account_id}][{self.address}] {service} delivered bridge {tracking_id} to {chain}"
+                        )
+                        record_latency(
+                            service, self.chain, chain, time.time() - start_time
+                        )
+                        return True
+
+                    new_balance = (await account.get_balance())["balance_wei"]
+                    if (
+                        new_balance
+                        >= balance_wei
+                        + increase_amount_wei
+                        - AsyncWeb3.to_wei(fee_inaccuracy, "ether")
+                    ):
+                        logger.success(
+                            f"[{self.account_id}][{self.address}] Balance increased from {balance_wei / 10 ** 18} to {new_balance / 10 ** 18}"
+                        )
+                        if service is not None:
+                            record_latency(
+                                service, self.chain, chain, time.time() - start_time
+                            )
+                        return True
+
+                    if delivery is not None:
+                        await asyncio.wait({delivery}, timeout=sleep)
+                    else:
+                        await asyncio.sleep(sleep)
+            finally:
+                if delivery is not None:
+                    untrack(service, tracking_id)
 
     @retry
-    async def wait_until_tx_finished(self, hash: str, max_wait_time=1000) -> None:
+    async def wait_until_tx_finished(self, hash: str, max_wait_time=1000) -> str:
         start_time = time.time()
+        hashes = [hash]
+        last_block = await self.w3.eth.block_number
+
         while True:
-            try:
-                receipts = await self.w3.eth.get_transaction_receipt(hash)
+            # any of the replacements can be included, the first receipt resolves the wait
+            for tx_hash in hashes:
+                try:
+                    receipts = await self.w3.eth.get_transaction_receipt(tx_hash)
+                except TransactionNotFound:
+                    continue
+
                 status = receipts.get("status")
                 if status == 1:
                     logger.success(
-                        f"[{self.account_id}][{self.address}] {self.explorer}{hash} successfully!"
+                        f"[{self.account_id}][{self.address}] {self.explorer}{tx_hash} successfully!"
                     )
-                    return
-                elif status is None:
-                    await asyncio.sleep(0.3)
-                else:
+                    return tx_hash
+                elif status is not None:
                     logger.error(
-                        f"[{self.account_id}][{self.address}] {self.explorer}{hash} transaction failed!"
+                        f"[{self.account_id}][{self.address}] {self.explorer}{tx_hash} transaction failed!"
                     )
-                    raise Exception(f"Transaction failed! {self.explorer}{hash}")
+                    raise await explain_failure(
+                        self.w3,
+                        self.sent_transactions.get(tx_hash),
+                        receipts["blockNumber"],
+                        f"Transaction failed! {self.explorer}{tx_hash}",
+                    )
+
+            if time.time() - start_time > max_wait_time:
+                logger.error(
+                    f"[{self.account_id}][{self.address}] {self.explorer}{hash} transaction not found!"
+                )
+                raise Exception(f"Transaction not found! {self.explorer}{hash}")
+
+            if len(hashes) <= TX_MAX_REPLACEMENTS:
+                current_block = await self.w3.eth.block_number
+                if current_block - last_block >= TX_REPLACE_AFTER_BLOCKS:
+                    replacement_hash = await self.replace_transaction(hashes[-1])
+                    if replacement_hash is not None:
+                        hashes.append(replacement_hash)
+                    last_block = current_block
+
+            await asyncio.sleep(1)
+
+    async def replace_transaction(self, hash: str) -> Optional[str]:
+        """Re-sign a stuck transaction with the same nonce and bumped fees"""
+
+        transaction = self.sent_transactions.get(hash)
+        if transaction is None:
+            try:
+                tx = await self.w3.eth.get_transaction(hash)
+            except TransactionNotFound:
+                logger.warning(
+                    f"[{self.account_id}][{self.address}] Can't replace {self.explorer}{hash}, transaction is unknown"
+                )
+                return None
+
+            transaction = {
+                "chainId": await self.w3.eth.chain_id,
+                "from": self.address,
+                "value": tx["value"],
+                "data": tx["input"],
+                "nonce": tx["nonce"],
+                "gas": tx["gas"],
+            }
+            if tx.get("to") is not None:
+                transaction.update({"to": tx["to"]})
+            if tx.get("maxFeePerGas") is not None:
+                transaction.update(
+                    {
+                        "maxFeePerGas": tx["maxFeePerGas"],
+                        "maxPriorityFeePerGas": tx["maxPriorityFeePerGas"],
+                    }
+                )
+            else:
+                transaction.update({"gasPrice": tx["gasPrice"]})
+
+        transaction = dict(transaction)
+        bump = 1 + TX_FEE_BUMP_PERCENT / 100
+        current_gas_price = await self.w3.eth.gas_price
+
+        if transaction.get("gasPrice") is not None:
+            transaction["gasPrice"] = max(
+                int(transaction["gasPrice"] * bump), current_gas_price
+            )
+        else:
+            transaction["maxPriorityFeePerGas"] = int(
+                transaction["maxPriorityFeePerGas"] * bump
+            )
+            transaction["maxFeePerGas"] = max(
+                int(transaction["maxFeePerGas"] * bump),
+                current_gas_price + transaction["maxPriorityFeePerGas"],
+            )
+
+        signed_txn = self.w3.eth.account.sign_transaction(transaction, self.private_key)
+
+        try:
+            txn_hash = await self.broadcast(signed_txn.rawTransaction)
+        except Exception as e:
+            # nonce too low means that one of the previous transactions was already included
+            logger.warning(
+                f"[{self.account_id}][{self.address}] Replacement of {self.explorer}{hash} rejected | {e}"
+            )
+            return None
+
+        logger.info(
+            f"[{self.account_id}][{self.address}] {self.explorer}{hash} is stuck, replaced with {self.explorer}{txn_hash.hex()}"
+        )
+        self.sent_transactions[txn_hash.hex()] = transaction
+
+        return txn_hash.hex()
+
+    async def wait_until_tx_accepted(self, hash: str, max_wait_time=60) -> None:
+        start_time = time.time()
+        while True:
+            try:
+                await self.w3.eth.get_transaction(hash)
+                return
             except TransactionNotFound:
                 if time.time() - start_time > max_wait_time:
                     logger.error(
-                        f"[{self.account_id}][{self.address}] {self.explorer}{hash} transaction not found!"
+                        f"[{self.account_id}][{self.address}] {self.explorer}{hash} transaction not found in mempool!"
                     )
                     raise Exception(f"Transaction not found! {self.explorer}{hash}")
-                await asyncio.sleep(1)
+                await asyncio.sleep(0.5)
 
     @retry
     async def sign(self, transaction, wait_for_gas=True) -> Any:
@@ -301,17 +493,57 @@ class Account:
                 }
             )
 
-        gas = await self.w3.eth.estimate_gas(transaction)
+        # simulate on top of the pending transactions of this account
+        call_transaction = {k: v for k, v in transaction.items() if k != "gas"}
+        reads = [
+            self.w3.eth.estimate_gas(
+                call_transaction, "pending" if PIPELINE_TRANSACTIONS else None
+            )
+        ]
+        if SIMULATE_TRANSACTIONS:
+            reads.append(simulate(self.w3, call_transaction))
+
+        gas, *simulation = await asyncio.gather(*reads, return_exceptions=True)
+        # decoded revert reason tells if the module should be skipped
+        for error in (*simulation, gas):
+            if isinstance(error, Exception):
+                if error is gas:
+                    error = explain_estimate_error(gas)
+                raise error
+
         gas = int(gas * GAS_MULTIPLIER)
 
         transaction.update({"gas": gas})
 
+        if PIPELINE_TRANSACTIONS:
+            # nonce is taken only now, a transaction abandoned while being built leaves no gap
+            transaction["nonce"] = await get_nonce(
+                self.w3, self.chain, self.address, reserve=True
+            )
+
         signed_txn = self.w3.eth.account.sign_transaction(transaction, self.private_key)
+        self.signed_transactions[signed_txn.hash] = transaction
 
         return signed_txn
 
+    async def broadcast(self, raw_transaction) -> HexBytes:
+        if BROADCAST_TO_ALL_RPC:
+            return await broadcast_raw_transaction(self.chain, raw_transaction)
+
+        return await self.w3.eth.send_raw_transaction(raw_transaction)
+
     @retry
     async def send_raw_transaction(self, signed_txn) -> HexBytes:
-        txn_hash = await self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        try:
+            txn_hash = await self.broadcast(signed_txn.rawTransaction)
+        except Exception as e:
+            transaction = self.signed_transactions.get(signed_txn.hash, {})
+            reset_nonce(self.chain, self.address, transaction.get("nonce"))
+            raise e
+
+        transaction = self.signed_transactions.pop(signed_txn.hash, None)
+        if transaction is not None:
+            mark_sent(self.chain, self.address, transaction["nonce"])
+            self.sent_transactions[txn_hash.hex()] = transaction
 
         return txn_hash
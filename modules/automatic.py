@@ -1,3 +1,4 @@
+import asyncio
 import enum
 import random
 from copy import deepcopy
@@ -8,13 +9,19 @@ from web3 import Web3
 from config import SCROLL_TOKENS
 from modules import *
 from settings import (
+    BRIDGE_EXPECTED_TIME,
     ENABLE_ERROR_TRACEBACK,
     RETRIES,
-    RETRY_DELAY_MAX,
-    RETRY_DELAY_MIN,
+    RETRY_BUDGET,
     SLEEP_MAX,
     SLEEP_MIN,
+    SWAP_BEST_QUOTE,
 )
+from utils.bridge_stats import get_percentile
+from utils.circuit_breaker import is_available
+from utils.eligibility import get_ineligible_modules, get_mintable_zkstars
+from utils.errors import ErrorKind, PERMANENT_ERRORS, classify_error
+from utils.helpers import RetryBudget, get_retry_delay, retry_budget
 from utils.sleeping import sleep
 
 
@@ -71,6 +78,9 @@ class Automatic(Account):
         self.bridge_in = None
         self.brdge_out = None
 
+        # kind of the error the last failed execute_func_with_retries gave up on
+        self.last_error_kind = None
+
         self._configure(modules)
 
         self.modules_mapping = {
@@ -98,7 +108,7 @@ class Automatic(Account):
             await self.okx_withdraw()
 
         if self.config[AutomaticModules.bridge_in]["bridge_in_enabled"]:
-            await self.bridge_in()
+            await self.bridge(AutomaticModules.bridge_in)
 
         await self.run_modules()
 
@@ -106,7 +116,7 @@ class Automatic(Account):
             await self.swap_all_tokens_to_eth()
 
         if self.config[AutomaticModules.bridge_out]["bridge_out_enabled"]:
-            await self.bridge_out()
+            await self.bridge(AutomaticModules.bridge_out)
 
         if self.config["okx_deposit_enabled"]:
             await self.okx_deposit()
@@ -131,37 +141,52 @@ class Automatic(Account):
     ):
         done = False
         retries = 0
-        while not done and retries <= max_retries:
-            try:
-                done = await func(**func_kwargs)
-            except Exception as e:
-                if ENABLE_ERROR_TRACEBACK:
-                    logger.error(
-                        f"[{self.account_id}][{self.address}] | {module_name} raised exception | {e}\nTraceback: {traceback.format_exc()}"
-                    )
-                else:
-                    logger.error(
-                        f"[{self.account_id}][{self.address}] | {module_name} raised exception | {e}"
-                    )
-                if str(e).startswith("520, "):
-                    logger.error(
-                        f"Probably an rpc error, I am not increasing the retry count"
-                    )
-                else:
+        kind = None
+        # nested @retry calls share this budget
+        token = retry_budget.set(RetryBudget(RETRY_BUDGET))
+
+        try:
+            while not done and retries <= max_retries:
+                kind, error = ErrorKind.unknown, None
+                try:
+                    done = await func(**func_kwargs)
+                except Exception as e:
+                    kind, error = classify_error(e), e
+                    if ENABLE_ERROR_TRACEBACK:
+                        logger.error(
+                            f"[{self.account_id}][{self.address}] | {module_name} raised exception | {kind.value} | {e}\nTraceback: {traceback.format_exc()}"
+                        )
+                    else:
+                        logger.error(
+                            f"[{self.account_id}][{self.address}] | {module_name} raised exception | {kind.value} | {e}"
+                        )
+
+                    if kind in PERMANENT_ERRORS:
+                        logger.error(
+                            f"[{self.account_id}][{self.address}] | {module_name} won't succeed on retry, skipping"
+                        )
+                        break
+
                     retries += 1
 
-            if not done:
-                if retries <= max_retries:
-                    logger.error(
-                        f"[{self.account_id}][{self.address}] | {module_name} failed. Retrying {retries}/{max_retries}"
-                    )
+                if not done:
+                    if retries <= max_retries:
+                        if not retry_budget.get().spend():
+                            logger.error(
+                                f"[{self.account_id}][{self.address}] | {module_name} retry budget is exhausted"
+                            )
+                            break
 
-                    await sleep(
-                        account_id=self.account_id,
-                        address=self.address,
-                        sleep_from=RETRY_DELAY_MIN,
-                        sleep_to=RETRY_DELAY_MAX,
-                    )
+                        delay = get_retry_delay(kind, retries - 1, error)
+                        logger.error(
+                            f"[{self.account_id}][{self.address}] | {module_name} failed. Retrying in {round(delay, 1)} seconds {retries}/{max_retries}"
+                        )
+
+                        await asyncio.sleep(delay)
+        finally:
+            retry_budget.reset(token)
+
+        self.last_error_kind = None if done else kind
 
         return done
 
@@ -231,10 +256,10 @@ class Automatic(Account):
 
             src_token = token
             dst_token = balances["ETH"]
-            swap_module = self.choose_swap_module(
-                config=config, src_token=src_token, dst_token=dst_token
-            )
             amount = self.get_amount(config=config, src_token=src_token)
+            swap_module = await self.choose_swap_module(
+                config=config, src_token=src_token, dst_token=dst_token, amount=amount
+            )
             return await self.execute_func_with_retries(
                 func=swap_module["class"](
                     account_id=self.account_id,
@@ -504,6 +529,17 @@ class Automatic(Account):
         return 0
 
     async def mint_zkstars(self, config):
+        contracts = get_mintable_zkstars(
+            self.address,
+            self.modules_config[MODULES_NAMES.mint_zkstars]["contracts"],
+        )
+        if not contracts:
+            logger.info(
+                f"[{self.account_id}][{self.address}] | Mint ZkStars can't succeed for this wallet, skipping"
+            )
+            self._remove_module_entries(AutomaticModules.mint_zkstars, 1, all=True)
+            return 0
+
         if await self.run_module(
             module_function=ZkStars(
                 account_id=self.account_id,
@@ -512,11 +548,7 @@ class Automatic(Account):
             module_name="Mint ZkStars",
             module_transaction_id=config["performed_quantity"] + 1,
             function_kwargs={
-                "contracts": [
-                    random.choice(
-                        self.modules_config[MODULES_NAMES.mint_zkstars]["contracts"]
-                    )
-                ],
+                "contracts": [random.choice(contracts)],
                 "min_mint": 1,
                 "max_mint": 1,
                 "mint_all": False,
@@ -672,13 +704,13 @@ class Automatic(Account):
         dst_token = self.choose_dst_token(
             src_token=src_token, balances=balances, config=config
         )
-        swap_module = self.choose_swap_module(
-            config=config, src_token=src_token, dst_token=dst_token
-        )
         amount = self.get_amount(
             config=config,
             src_token=src_token,
         )
+        swap_module = await self.choose_swap_module(
+            config=config, src_token=src_token, dst_token=dst_token, amount=amount
+        )
 
         return await swap_module["class"](
             account_id=self.account_id,
@@ -715,7 +747,7 @@ class Automatic(Account):
 
         return "all"
 
-    def choose_swap_module(self, config, src_token, dst_token):
+    async def choose_swap_module(self, config, src_token, dst_token, amount):
         modules = []
         for module_name in config["services"]:
             module = SWAP_MODULES[module_name]
@@ -727,7 +759,59 @@ class Automatic(Account):
                 module["name"] = module_name
                 modules.append(module)
 
-        return random.choice(modules)
+        # don't wait for the api that is down if there is another service
+        available = [
+            module
+            for module in modules
+            if "service" not in module or is_available(module["service"])
+        ]
+
+        if SWAP_BEST_QUOTE and len(available) > 1:
+            best_module = await self.choose_best_swap_module(
+                modules=available,
+                src_token=src_token,
+                dst_token=dst_token,
+                amount=amount,
+            )
+            if best_module is not None:
+                return best_module
+
+        return random.choice(available or modules)
+
+    async def choose_best_swap_module(self, modules, src_token, dst_token, amount):
+        if amount == "all":
+            amount_wei = src_token["balance_wei"]
+        else:
+            amount_wei = int(amount * 10 ** src_token["decimal"])
+
+        try:
+            quotes = await SwapAggregator(
+                account_id=self.account_id, private_key=self.private_key
+            ).get_quotes(
+                modules,
+                src_token["symbol"].upper(),
+                dst_token["symbol"].upper(),
+                amount_wei,
+            )
+        except Exception as e:
+            logger.warning(
+                f"[{self.account_id}][{self.address}] | Swap quotes failed, choosing a random dex | {e}"
+            )
+            return None
+
+        if not quotes:
+            return None
+
+        logger.info(
+            f"[{self.account_id}][{self.address}] | Swap quotes {src_token['symbol']} -> {dst_token['symbol']} | "
+            + " | ".join(
+                f"{q.module['name']}: {q.amount_out / 10 ** dst_token['decimal']} {dst_token['symbol']}, "
+                + f"after gas {q.net_amount / 10 ** dst_token['decimal']}"
+                for q in quotes
+            )
+        )
+
+        return quotes[0].module
 
     def choose_number_of_swaps(self, config):
         maximum = config["max_quantity"] - config["performed_quantity"]
@@ -792,6 +876,46 @@ class Automatic(Account):
 
         return balances
 
+    def choose_bridge_service(self, direction, exclude=None) -> str:
+        service = self.config[direction][f"{direction.value}_service"]
+        chain = self.config[direction][f"{direction.value}_chain"]
+
+        if service == exclude or (
+            service in BRIDGE_MODULES and not is_available(service)
+        ):
+            alternatives = [
+                name
+                for name, module in BRIDGE_MODULES.items()
+                if name != exclude and chain in module["chains"] and is_available(name)
+            ]
+            if alternatives:
+                alternative = random.choice(alternatives)
+                logger.warning(
+                    f"[{self.account_id}][{self.address}] | {service} is unavailable, using {alternative} for {direction.value}"
+                )
+                return alternative
+
+        return service
+
+    async def bridge(self, direction):
+        service = self.choose_bridge_service(direction)
+
+        try:
+            return await getattr(self, f"{service}_{direction.value}")()
+        except ValueError as e:
+            # the api went down before anything was sent, another bridge can do it
+            if (
+                self.last_error_kind != ErrorKind.service_unavailable
+                or service not in BRIDGE_MODULES
+            ):
+                raise e
+
+            alternative = self.choose_bridge_service(direction, exclude=service)
+            if alternative == service:
+                raise e
+
+        return await getattr(self, f"{alternative}_{direction.value}")()
+
     async def okx_deposit(self):
         config = self.modules_config[MODULES_NAMES.okx_deposit]
         okx_client = OKX(
@@ -1010,6 +1134,60 @@ class Automatic(Account):
 
         return True
 
+    async def auto_bridge_in(self):
+        config = self.modules_config[MODULES_NAMES.bridge_auto]
+
+        aggregator = BridgeAggregator(
+            self.account_id,
+            self.private_key,
+            chain=self.config[AutomaticModules.bridge_in]["bridge_in_chain"],
+        )
+        if not await self.execute_func_with_retries(
+            func=aggregator.bridge,
+            func_kwargs={
+                "to_chain": "scroll",
+                "min_amount": config["min_amount"],
+                "max_amount": config["max_amount"],
+                "decimal": config["decimal"],
+                "all_amount": config["all_amount"],
+                "min_percent": config["min_percent"],
+                "max_percent": config["max_percent"],
+            },
+            module_name="Auto bridge in",
+        ):
+            raise ValueError("Auto bridge in failed")
+
+        return True
+
+    async def auto_bridge_out(self):
+        try:
+            amount = await self.get_amount_to_bridge_out()
+        except ValueError:
+            logger.info(
+                f"[{self.account_id}][{self.address}] | Balance is too low to bridge out, skipping"
+            )
+            return True
+
+        aggregator = BridgeAggregator(self.account_id, self.private_key, chain="scroll")
+        if not await self.execute_func_with_retries(
+            func=aggregator.bridge,
+            func_kwargs={
+                "to_chain": self.config[AutomaticModules.bridge_out][
+                    "bridge_out_chain"
+                ],
+                "min_amount": amount,
+                "max_amount": amount,
+                "decimal": 5,
+                "all_amount": False,
+                "min_percent": 0,
+                "max_percent": 0,
+            },
+            module_name="Auto bridge out",
+        ):
+            raise ValueError("Auto bridge out failed")
+
+        return True
+
     async def native_bridge_in(self):
         config = self.modules_config[MODULES_NAMES.bridge_in_scroll]
 
@@ -1095,7 +1273,46 @@ class Automatic(Account):
             or ((removed := removed + 1) > quantity and not all)
         ]
 
+    def get_fastest_bridge(self, direction) -> str:
+        """Bridge with the lowest median arrival time for the route of bridge_in or bridge_out"""
+
+        chain = self.config[direction][f"{direction.value}_chain"]
+        from_chain, to_chain = (
+            (chain, "scroll")
+            if direction == AutomaticModules.bridge_in
+            else ("scroll", chain)
+        )
+
+        services = [
+            name
+            for name, module in BRIDGE_MODULES.items()
+            if chain in module["chains"] and is_available(name)
+        ]
+        if chain == "ethereum":
+            services.append("native")
+        if not services:
+            raise ValueError(
+                f"No bridge for {direction.value} from {from_chain} to {to_chain}"
+            )
+
+        def expected_time(service):
+            p50 = get_percentile(service, from_chain, to_chain, 50)
+            return p50 if p50 is not None else BRIDGE_EXPECTED_TIME[service]
+
+        service = min(services, key=expected_time)
+        logger.info(
+            f"[{self.account_id}][{self.address}] | Fastest {direction.value} from {from_chain} to {to_chain} is {service}"
+        )
+
+        return service
+
     def _configure(self, modules):
+        for direction in (AutomaticModules.bridge_in, AutomaticModules.bridge_out):
+            if self.config[direction][f"{direction.value}_service"] == "fastest":
+                self.config[direction][f"{direction.value}_service"] = (
+                    self.get_fastest_bridge(direction)
+                )
+
         if self.config[AutomaticModules.bridge_in]["bridge_in_service"] == "native":
             self.bridge_in = self.native_bridge_in
         elif self.config[AutomaticModules.bridge_in]["bridge_in_service"] == "orbiter":
@@ -1106,6 +1323,8 @@ class Automatic(Account):
             self.bridge_in = self.layerswap_bridge_in
         elif self.config[AutomaticModules.bridge_in]["bridge_in_service"] == "nitro":
             self.bridge_in = self.nitro_bridge_in
+        elif self.config[AutomaticModules.bridge_in]["bridge_in_service"] == "auto":
+            self.bridge_in = self.auto_bridge_in
         else:
             raise ValueError(
                 f"Unknown bridge_in_service: {self.config[AutomaticModules.bridge_in]['bridge_in_service']}"
@@ -1123,12 +1342,22 @@ class Automatic(Account):
             self.bridge_out = self.layerswap_bridge_out
         elif self.config[AutomaticModules.bridge_out]["bridge_out_service"] == "nitro":
             self.bridge_out = self.nitro_bridge_out
+        elif self.config[AutomaticModules.bridge_out]["bridge_out_service"] == "auto":
+            self.bridge_out = self.auto_bridge_out
         else:
             raise ValueError(
                 f"Unknown bridge_out_service: {self.config[AutomaticModules.bridge_out]['bridge_out_service']}"
             )
 
+        ineligible = get_ineligible_modules(self.address)
+
         for module_name in modules:
+            if module_name in ineligible:
+                logger.info(
+                    f"[{self.account_id}][{self.address}] | {module_name} can't succeed for this wallet, skipping"
+                )
+                continue
+
             quantity = random.randint(
                 self.config[module_name]["min_quantity"],
                 self.config[module_name]["max_quantity"],
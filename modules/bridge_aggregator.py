@@ -0,0 +1,188 @@
+import asyncio
+from typing import Optional
+
+from loguru import logger
+
+from settings import (
+    BRIDGE_EXPECTED_TIME,
+    BRIDGE_FEES,
+    BRIDGE_MINUTE_COST,
+    BRIDGE_QUOTE_TIMEOUT,
+)
+from utils.bridge_stats import get_percentile
+from utils.circuit_breaker import is_available
+from utils.errors import ErrorKind, classify_error
+from utils.helpers import retry
+from .account import Account
+from .layerswap import LayerSwap
+from .nitro import Nitro
+from .orbiter import Orbiter
+
+
+class BridgeQuote:
+    def __init__(self, service: str, fee_wei: int, seconds: float) -> None:
+        self.service = service
+        self.fee_wei = fee_wei
+        self.seconds = seconds
+
+    @property
+    def score(self) -> float:
+        """Fee in ETH plus the price of waiting, lower is better"""
+
+        return self.fee_wei / 10**18 + self.seconds / 60 * BRIDGE_MINUTE_COST
+
+
+class BridgeAggregator(Account):
+    def __init__(self, account_id: int, private_key: str, chain: str) -> None:
+        super().__init__(account_id=account_id, private_key=private_key, chain=chain)
+
+        self.services = {
+            "orbiter": Orbiter(account_id, private_key, chain),
+            "nitro": Nitro(account_id, private_key, chain),
+            "layerswap": LayerSwap(account_id, private_key, chain),
+        }
+
+    def supports(self, service: str, to_chain: str) -> bool:
+        bridge = self.services[service]
+        chains = bridge.networks if service == "layerswap" else bridge.chain_ids
+
+        return self.chain in chains and to_chain in chains
+
+    async def quote_orbiter(self, to_chain: str, amount_wei: int) -> Optional[int]:
+        amount = self.w3.from_wei(amount_wei, "ether")
+        send_value = await self.services["orbiter"].get_bridge_amount(
+            self.chain, to_chain, amount
+        )
+        if not send_value:
+            return None
+
+        # orbiter fee is the part of the sent value above the amount
+        return max(send_value - amount_wei, 0)
+
+    async def quote_nitro(self, to_chain: str, amount_wei: int) -> Optional[int]:
+        quote = await self.services["nitro"].get_quote(amount_wei, to_chain)
+        if "destination" not in quote:
+            return None
+
+        return amount_wei - int(quote["destination"]["tokenAmount"])
+
+    async def quote_layerswap(self, to_chain: str, amount_wei: int) -> Optional[int]:
+        layerswap = self.services["layerswap"]
+        route, swap_rate = await asyncio.gather(
+            layerswap.check_available_route(self.chain, to_chain),
+            layerswap.get_swap_rate(self.chain, to_chain),
+        )
+        if not route or not swap_rate:
+            return None
+
+        amount = float(self.w3.from_wei(amount_wei, "ether"))
+        if not swap_rate["min_amount"] <= amount <= swap_rate["max_amount"]:
+            return None
+
+        return self.w3.to_wei(swap_rate["fee_amount"], "ether")
+
+    async def get_quote(
+        self, service: str, to_chain: str, amount_wei: int
+    ) -> Optional[BridgeQuote]:
+        if not self.supports(service, to_chain) or not is_available(service):
+            return None
+
+        try:
+            fee_wei = await asyncio.wait_for(
+                getattr(self, f"quote_{service}")(to_chain, amount_wei),
+                BRIDGE_QUOTE_TIMEOUT,
+            )
+        except Exception as e:
+            logger.warning(
+                f"[{self.account_id}][{self.address}] {service} quote failed | {e}"
+            )
+            return None
+
+        if fee_wei is None:
+            return None
+
+        seconds = get_percentile(service, self.chain, to_chain, 50)
+        if seconds is None:
+            seconds = BRIDGE_EXPECTED_TIME[service]
+
+        return BridgeQuote(service, fee_wei, seconds)
+
+    async def get_quotes(self, to_chain: str, amount_wei: int) -> list:
+        """Quotes of every bridge that can serve the route, best first"""
+
+        quotes = await asyncio.gather(
+            *[
+                self.get_quote(service, to_chain, amount_wei)
+                for service in self.services
+            ]
+        )
+
+        return sorted([q for q in quotes if q is not None], key=lambda q: q.score)
+
+    @retry
+    async def bridge(
+        self,
+        to_chain: str,
+        min_amount: float,
+        max_amount: float,
+        decimal: int,
+        all_amount: bool,
+        min_percent: int,
+        max_percent: int,
+    ):
+        # the amount is drawn once, the chosen bridge sends the one it was quoted for
+        amount_wei, amount, balance = await self.get_amount(
+            "ETH",
+            min_amount,
+            max_amount,
+            decimal,
+            all_amount,
+            min_percent,
+            max_percent,
+            fee_cost_wei=self.w3.to_wei(
+                max(BRIDGE_FEES[service] for service in self.services), "ether"
+            ),
+        )
+
+        quotes = await self.get_quotes(to_chain, amount_wei)
+        if not quotes:
+            logger.error(
+                f"[{self.account_id}][{self.address}] No bridge can serve {self.chain} -> {to_chain} | {amount} ETH"
+            )
+            return
+
+        logger.info(
+            f"[{self.account_id}][{self.address}] Bridge quotes {self.chain} -> {to_chain} | "
+            + " | ".join(
+                f"{q.service}: fee {round(q.fee_wei / 10 ** 18, 6)} ETH, ~{q.seconds} s"
+                for q in quotes
+            )
+        )
+
+        for quote in quotes:
+            bridge = self.services[quote.service]
+            try:
+                if await bridge.bridge(
+                    to_chain=to_chain,
+                    min_amount=min_amount,
+                    max_amount=max_amount,
+                    decimal=decimal,
+                    all_amount=all_amount,
+                    min_percent=min_percent,
+                    max_percent=max_percent,
+                    amount_wei=amount_wei,
+                ):
+                    return True
+            except Exception as e:
+                if bridge.sent_transactions or (
+                    classify_error(e) != ErrorKind.service_unavailable
+                ):
+                    raise e
+
+            # funds may be on the way already, another bridge would send them twice
+            if bridge.sent_transactions:
+                return
+
+            logger.warning(
+                f"[{self.account_id}][{self.address}] {quote.service} didn't bridge, trying the next one"
+            )
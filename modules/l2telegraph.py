@@ -135,9 +135,9 @@ class L2Telegraph(Account):
 
             txn_hash = await self.send_raw_transaction(signed_txn)
 
-            await self.wait_until_tx_finished(txn_hash.hex())
+            mined_hash = await self.wait_until_tx_finished(txn_hash.hex())
 
-            nft_id = await self.get_nft_id(txn_hash.hex())
+            nft_id = await self.get_nft_id(mined_hash)
 
             return nft_id
         except Exception as e:
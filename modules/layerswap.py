@@ -1,11 +1,14 @@
-from typing import Union, Dict
+import asyncio
+from typing import Union, Dict, Optional
 
-import aiohttp
 from loguru import logger
 
 from settings import LAYERSWAP_API_KEY
 from utils.gas_checker import check_gas
+from utils.cache import route_cache
+from utils.errors import FundsNotArrivedError
 from utils.helpers import retry
+from utils.http import request
 from .account import Account
 
 
@@ -28,6 +31,14 @@ class LayerSwap(Account):
 
     async def check_available_route(
         self, from_chain: str, to_chain: str
+    ) -> Union[Dict, bool]:
+        return await route_cache.get(
+            ("layerswap_route", from_chain, to_chain, "ETH"),
+            lambda: self.fetch_available_route(from_chain, to_chain),
+        )
+
+    async def fetch_available_route(
+        self, from_chain: str, to_chain: str
     ) -> Union[Dict, bool]:
         url = "https://api.layerswap.io/api/available_routes"
 
@@ -38,28 +49,35 @@ class LayerSwap(Account):
             "destinationAsset": "ETH",
         }
 
-        async with aiohttp.ClientSession() as session:
-            response = await session.get(url=url, params=params)
+        response = await request("GET", url, params=params, service="layerswap")
 
-            if response.status == 200:
-                transaction_data = await response.json()
+        if response.status == 200:
+            transaction_data = await response.json()
 
-                if transaction_data["data"]:
-                    return transaction_data["data"]
-                else:
-                    logger.error(
-                        f"[{self.account_id}][{self.address}][{self.chain}] Layerswap path not found"
-                    )
-
-                    return False
+            if transaction_data["data"]:
+                return transaction_data["data"]
             else:
                 logger.error(
-                    f"[{self.account_id}][{self.address}][{self.chain}] Bad layerswap request"
+                    f"[{self.account_id}][{self.address}][{self.chain}] Layerswap path not found"
                 )
 
                 return False
+        else:
+            logger.error(
+                f"[{self.account_id}][{self.address}][{self.chain}] Bad layerswap request"
+            )
+
+            return False
 
     async def get_swap_rate(self, from_chain: str, to_chain: str) -> Union[Dict, bool]:
+        return await route_cache.get(
+            ("layerswap_rate", from_chain, to_chain, "ETH"),
+            lambda: self.fetch_swap_rate(from_chain, to_chain),
+        )
+
+    async def fetch_swap_rate(
+        self, from_chain: str, to_chain: str
+    ) -> Union[Dict, bool]:
         url = "https://api.layerswap.io/api/swap_rate"
 
         params = {
@@ -70,26 +88,25 @@ class LayerSwap(Account):
             "refuel": False,
         }
 
-        async with aiohttp.ClientSession() as session:
-            response = await session.post(url=url, json=params)
+        response = await request("POST", url, json=params, service="layerswap")
 
-            if response.status == 200:
-                transaction_data = await response.json()
+        if response.status == 200:
+            transaction_data = await response.json()
 
-                if transaction_data["data"]:
-                    return transaction_data["data"]
-                else:
-                    logger.error(
-                        f"[{self.account_id}][{self.address}][{self.chain}] Layerswap swap rate error"
-                    )
-
-                    return False
+            if transaction_data["data"]:
+                return transaction_data["data"]
             else:
                 logger.error(
-                    f"[{self.account_id}][{self.address}][{self.chain}] Bad layerswap request"
+                    f"[{self.account_id}][{self.address}][{self.chain}] Layerswap swap rate error"
                 )
 
                 return False
+        else:
+            logger.error(
+                f"[{self.account_id}][{self.address}][{self.chain}] Bad layerswap request"
+            )
+
+            return False
 
     async def create_swap(
         self, from_chain: str, to_chain: str, amount: float
@@ -106,26 +123,27 @@ class LayerSwap(Account):
             "destination_address": self.address,
         }
 
-        async with aiohttp.ClientSession() as session:
-            response = await session.post(url=url, headers=self.headers, json=params)
-
-            if response.status == 200:
-                transaction_data = await response.json()
+        response = await request(
+            "POST", url, headers=self.headers, json=params, service="layerswap"
+        )
 
-                if transaction_data["data"]:
-                    return transaction_data["data"]["swap_id"]
-                else:
-                    logger.error(
-                        f"[{self.account_id}][{self.address}][{self.chain}] Layerswap swap rate error"
-                    )
+        if response.status == 200:
+            transaction_data = await response.json()
 
-                    return False
+            if transaction_data["data"]:
+                return transaction_data["data"]["swap_id"]
             else:
                 logger.error(
-                    f"[{self.account_id}][{self.address}][{self.chain}] Bad layerswap request"
+                    f"[{self.account_id}][{self.address}][{self.chain}] Layerswap swap rate error"
                 )
 
                 return False
+        else:
+            logger.error(
+                f"[{self.account_id}][{self.address}][{self.chain}] Bad layerswap request"
+            )
+
+            return False
 
     async def get_swap_path(
         self, from_chain: str, to_chain: str, amount: float
@@ -134,26 +152,25 @@ class LayerSwap(Account):
 
         url = f"https://api.layerswap.io/api/swaps/{swap_id}"
 
-        async with aiohttp.ClientSession() as session:
-            response = await session.get(url=url, headers=self.headers)
-
-            if response.status == 200:
-                transaction_data = await response.json()
+        response = await request("GET", url, headers=self.headers, service="layerswap")
 
-                if transaction_data["data"]:
-                    return transaction_data["data"]
-                else:
-                    logger.error(
-                        f"[{self.account_id}][{self.address}][{self.chain}] Layerswap swap rate error"
-                    )
+        if response.status == 200:
+            transaction_data = await response.json()
 
-                    return False
+            if transaction_data["data"]:
+                return transaction_data["data"]
             else:
                 logger.error(
-                    f"[{self.account_id}][{self.address}][{self.chain}] Bad layerswap request"
+                    f"[{self.account_id}][{self.address}][{self.chain}] Layerswap swap rate error"
                 )
 
                 return False
+        else:
+            logger.error(
+                f"[{self.account_id}][{self.address}][{self.chain}] Bad layerswap request"
+            )
+
+            return False
 
     @retry
     async def bridge(
@@ -165,38 +182,42 @@ class LayerSwap(Account):
         all_amount: bool,
         min_percent: int,
         max_percent: int,
+        amount_wei: Optional[int] = None,
     ):
         try:
-            amount_wei, amount, balance = await self.get_amount(
-                "ETH",
-                min_amount,
-                max_amount,
-                decimal,
-                all_amount,
-                min_percent,
-                max_percent,
-            )
-            logger.info(
-                f"[{self.account_id}][{self.address}] Bridge on LayerSwap {self.chain} -> {to_chain} | "
-                + f"{self.w3.from_wei(amount, 'ether')} ETH"
-            )
-
             dst_account = Account(
                 account_id=self.account_id,
                 private_key=self.private_key,
                 chain=to_chain,
             )
-            cur_dst_balance_wei = await dst_account.w3.eth.get_balance(
-                dst_account.address
+            (
+                (amount_wei, amount, balance),
+                cur_dst_balance_wei,
+                available_route,
+                swap_rate,
+            ) = await asyncio.gather(
+                self.get_amount(
+                    "ETH",
+                    min_amount,
+                    max_amount,
+                    decimal,
+                    all_amount,
+                    min_percent,
+                    max_percent,
+                    amount_wei=amount_wei,
+                ),
+                dst_account.w3.eth.get_balance(dst_account.address),
+                self.check_available_route(self.chain, to_chain),
+                self.get_swap_rate(self.chain, to_chain),
+            )
+            logger.info(
+                f"[{self.account_id}][{self.address}] Bridge on LayerSwap {self.chain} -> {to_chain} | "
+                + f"{self.w3.from_wei(amount, 'ether')} ETH"
             )
-
-            available_route = await self.check_available_route(self.chain, to_chain)
 
             if available_route is False:
                 return
 
-            swap_rate = await self.get_swap_rate(self.chain, to_chain)
-
             if amount < swap_rate["min_amount"] or amount > swap_rate["max_amount"]:
                 logger.error(
                     f"[{self.account_id}][{self.address}][{self.chain}] Limit range amount for bridge "
@@ -207,12 +228,13 @@ class LayerSwap(Account):
             if swap_rate is False:
                 return
 
-            swap_path = await self.get_swap_path(self.chain, to_chain, amount)
+            swap_path, tx_data = await asyncio.gather(
+                self.get_swap_path(self.chain, to_chain, amount),
+                self.get_tx_data(amount_wei),
+            )
 
             if swap_path is False:
                 return
-
-            tx_data = await self.get_tx_data(amount_wei)
             tx_data.update(
                 {"to": self.w3.to_checksum_address(swap_path["deposit_address"])}
             )
@@ -223,11 +245,14 @@ class LayerSwap(Account):
 
             await self.wait_until_tx_finished(txn_hash.hex())
 
-            await self.wait_for_balance_increase(
+            if not await self.wait_for_balance_increase(
                 balance_wei=cur_dst_balance_wei,
                 increase_amount_wei=tx_data["value"],
                 chain=to_chain,
-            )
+                service="layerswap",
+                tracking_id=swap_path.get("id"),
+            ):
+                raise FundsNotArrivedError(f"Bridged funds didn't arrive to {to_chain}")
         except Exception as e:
             logger.error(
                 f"[{self.account_id}][{self.address}] Bridge on LayerSwap Error | {e}"
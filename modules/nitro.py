@@ -1,7 +1,12 @@
-import aiohttp
+import asyncio
+from typing import Optional
+
 from loguru import logger
 from utils.gas_checker import check_gas
+from utils.cache import quote_cache
+from utils.errors import FundsNotArrivedError
 from utils.helpers import retry
+from utils.http import request
 from .account import Account
 from settings import BRIDGE_FEES
 
@@ -21,6 +26,12 @@ class Nitro(Account):
         }
 
     async def get_quote(self, amount: int, destination_chain: str):
+        return await quote_cache.get(
+            ("nitro", self.chain, destination_chain, "ETH", amount),
+            lambda: self.fetch_quote(amount, destination_chain),
+        )
+
+    async def fetch_quote(self, amount: int, destination_chain: str):
         url = "https://api-beta.pathfinder.routerprotocol.com/api/v2/quote"
 
         params = {
@@ -32,22 +43,20 @@ class Nitro(Account):
             "partnerId": 1,
         }
 
-        async with aiohttp.ClientSession() as session:
-            response = await session.get(url=url, params=params)
+        response = await request("GET", url, params=params, service="nitro")
 
-            transaction_data = await response.json()
+        transaction_data = await response.json()
 
-            return transaction_data
+        return transaction_data
 
     async def build_transaction(self, params: dict):
         url = "https://api-beta.pathfinder.routerprotocol.com/api/v2/transaction"
 
-        async with aiohttp.ClientSession() as session:
-            response = await session.post(url=url, json=params)
+        response = await request("POST", url, json=params, service="nitro")
 
-            transaction_data = await response.json()
+        transaction_data = await response.json()
 
-            return transaction_data
+        return transaction_data
 
     @retry
     async def bridge(
@@ -59,26 +68,27 @@ class Nitro(Account):
         all_amount: bool,
         min_percent: int,
         max_percent: int,
+        amount_wei: Optional[int] = None,
     ):
         try:
-            amount_wei, amount, balance = await self.get_amount(
-                "ETH",
-                min_amount,
-                max_amount,
-                decimal,
-                all_amount,
-                min_percent,
-                max_percent,
-                fee_cost_wei=self.w3.to_wei(BRIDGE_FEES["nitro"], "ether"),
-            )
-
             dst_account = Account(
                 account_id=self.account_id,
                 private_key=self.private_key,
                 chain=to_chain,
             )
-            cur_dst_balance_wei = await dst_account.w3.eth.get_balance(
-                dst_account.address
+            (amount_wei, amount, balance), cur_dst_balance_wei = await asyncio.gather(
+                self.get_amount(
+                    "ETH",
+                    min_amount,
+                    max_amount,
+                    decimal,
+                    all_amount,
+                    min_percent,
+                    max_percent,
+                    fee_cost_wei=self.w3.to_wei(BRIDGE_FEES["nitro"], "ether"),
+                    amount_wei=amount_wei,
+                ),
+                dst_account.w3.eth.get_balance(dst_account.address),
             )
 
             logger.info(
@@ -86,14 +96,15 @@ class Nitro(Account):
                 + f"{to_chain.title()} | {amount} ETH"
             )
 
-            quote = await self.get_quote(amount_wei, to_chain)
+            quote, tx_data = await asyncio.gather(
+                self.get_quote(amount_wei, to_chain),
+                self.get_tx_data(),
+            )
             quote.update(
                 {"senderAddress": self.address, "receiverAddress": self.address}
             )
 
             transaction_data = await self.build_transaction(quote)
-
-            tx_data = await self.get_tx_data()
             tx_data.update(
                 {
                     "from": self.w3.to_checksum_address(
@@ -109,13 +120,16 @@ class Nitro(Account):
 
             txn_hash = await self.send_raw_transaction(signed_txn)
 
-            await self.wait_until_tx_finished(txn_hash.hex())
+            mined_hash = await self.wait_until_tx_finished(txn_hash.hex())
 
-            await self.wait_for_balance_increase(
+            if not await self.wait_for_balance_increase(
                 balance_wei=cur_dst_balance_wei,
                 increase_amount_wei=tx_data["value"],
                 chain=to_chain,
-            )
+                service="nitro",
+                tracking_id=mined_hash,
+            ):
+                raise FundsNotArrivedError(f"Bridged funds didn't arrive to {to_chain}")
         except Exception as e:
             logger.error(
                 f"[{self.account_id}][{self.address}] Bridge Nitro Error | {e}"
@@ -1,17 +1,23 @@
-import asyncio
-import base64
-import hmac
 import random
-import time
-from typing import Union
-import ccxt
-import requests
+import ccxt.async_support as ccxt
 from modules.account import Account
 from config import RPC
 from loguru import logger
-import datetime
 
+from utils.concurrency import parked
 from utils.gas_checker import check_gas
+from utils.okx_client import (
+    get_okx_client,
+    get_withdrawal_fee,
+    sweep_subaccounts,
+    wait_for_withdrawal,
+)
+from utils.okx_planner import (
+    is_submitted,
+    mark_submitted,
+    plan_withdrawal,
+    take_planned_withdrawal,
+)
 
 
 class OKX(Account):
@@ -33,51 +39,61 @@ class OKX(Account):
         if self.okx_network_name is None:
             raise ValueError(f"Couldn't get the okx network name for {chain}")
 
-        self.client = ccxt.okx(
-            config={
-                "apiKey": self.credentials["apikey"],
-                "secret": self.credentials["apisecret"],
-                "password": self.credentials["passphrase"],
-                "enableRateLimit": True,
-            }
-        )
+        self.client = get_okx_client(self.credentials)
 
     async def wait_for_withdrawal(self, txid):
         logger.info(
             f"[{self.account_id}][{self.address}] Waiting for OKX withdrawal to complete| txid: {txid}"
         )
-        while True:
-            # fetch recent withdrawals
-            withdrawal = self.client.fetch_withdrawal(id=txid)
-
-            if withdrawal["status"] == "ok":
-                return
-            elif withdrawal["status"] == "failed":
-                raise ValueError(
-                    f"[{self.account_id}][{self.address}] OKX Withdraw Failed | response: {withdrawal}"
-                )
-            elif withdrawal["status"] == "canceled":
-                raise ValueError(
-                    f"[{self.account_id}][{self.address}] OKX Withdraw Canceled | response: {withdrawal}"
-                )
-            elif withdrawal["status"] == "pending":
-                logger.debug(
-                    f"[{self.account_id}][{self.address}] OKX Withdraw Pending | response: {withdrawal}"
-                )
-            else:
-                raise ValueError(
-                    f"[{self.account_id}][{self.address}] OKX Withdraw Unknown Status | response: {withdrawal}"
-                )
+        async with parked("OKX withdrawal is done", self.account_id, self.address):
+            try:
+                await wait_for_withdrawal(self.client, txid)
+            except ValueError as e:
+                raise ValueError(f"[{self.account_id}][{self.address}] {e}")
+
+    def plan_withdrawal(
+        self, min_amount, max_amount, token, transfer_from_subaccounts=False
+    ):
+        """Withdraw ahead of time, withdraw of this account will wait for it"""
+
+        amount_to_withdraw = round(random.uniform(min_amount, max_amount), 6)
 
-            # wait before checking again
-            await asyncio.sleep(60)
+        plan_withdrawal(
+            self.address,
+            lambda: self.withdraw_amount(
+                amount_to_withdraw, token, transfer_from_subaccounts
+            ),
+        )
 
     @check_gas
     async def withdraw(
         self, min_amount, max_amount, token, transfer_from_subaccounts=False
     ):
+        planned = take_planned_withdrawal(self.address)
+        if planned is not None:
+            try:
+                async with parked(
+                    "planned OKX withdrawal is done", self.account_id, self.address
+                ):
+                    return await planned
+            except Exception as e:
+                # funds might be on the way already
+                if is_submitted(self.address):
+                    raise e
+
+                logger.warning(
+                    f"[{self.account_id}][{self.address}] Planned OKX withdrawal wasn't sent, withdrawing now | {e}"
+                )
+
         amount_to_withdraw = round(random.uniform(min_amount, max_amount), 6)
 
+        return await self.withdraw_amount(
+            amount_to_withdraw, token, transfer_from_subaccounts
+        )
+
+    async def withdraw_amount(
+        self, amount_to_withdraw, token, transfer_from_subaccounts=False
+    ):
         logger.info(
             f"[{self.account_id}][{self.address}] Withdrawing from OKX | {amount_to_withdraw} ETH"
         )
@@ -87,23 +103,25 @@ class OKX(Account):
 
         try:
             chainName = token + "-" + self.okx_network_name
-            fee = self.get_withdrawal_fee(token, chainName)
-
-            response = self.client.withdraw(
-                token,
-                amount_to_withdraw,
-                self.address,
-                params={
-                    "toAddr": self.address,
-                    "chainName": chainName,
-                    "dest": 4,
-                    "fee": fee,
-                    "pwd": "-",
-                    "amt": amount_to_withdraw,
-                    "network": self.okx_network_name,
-                },
-            )
+            fee = await get_withdrawal_fee(self.client, token, chainName)
+
+            try:
+                response = await self.send_withdrawal(
+                    token, amount_to_withdraw, chainName, fee
+                )
+            except ccxt.BaseError as error:
+                if "fee" not in str(error).lower():
+                    raise error
+
+                # okx changed the fee since the table was loaded
+                fee = await get_withdrawal_fee(
+                    self.client, token, chainName, refresh=True
+                )
+                response = await self.send_withdrawal(
+                    token, amount_to_withdraw, chainName, fee
+                )
 
+            mark_submitted(self.address)
             await self.wait_for_withdrawal(response["info"]["wdId"])
 
             logger.info(
@@ -117,26 +135,20 @@ class OKX(Account):
 
         return True
 
-    def get_withdrawal_fee(self, token, chainName):
-        currencies = self.client.fetch_currencies()
-        for currency in currencies:
-            if currency == token:
-                currency_info = currencies[currency]
-                network_info = currency_info.get("networks", None)
-                if network_info:
-                    for cur_network in network_info:
-                        network_data = network_info[cur_network]
-                        network_id = network_data["id"]
-                        if network_id == chainName:
-                            withdrawal_fee = currency_info["networks"][cur_network][
-                                "fee"
-                            ]
-                            if withdrawal_fee == 0:
-                                return 0
-                            else:
-                                return withdrawal_fee
-        raise ValueError(
-            f"Couldn't get the withdrawal fee for {token=} and {chainName=}"
+    async def send_withdrawal(self, token, amount, chainName, fee):
+        return await self.client.withdraw(
+            token,
+            amount,
+            self.address,
+            params={
+                "toAddr": self.address,
+                "chainName": chainName,
+                "dest": 4,
+                "fee": fee,
+                "pwd": "-",
+                "amt": amount,
+                "network": self.okx_network_name,
+            },
         )
 
     async def deposit(self, address, min_amount_left, max_amount_left):
@@ -170,7 +182,7 @@ class OKX(Account):
         tx = {
             "chainId": await self.w3.eth.chain_id,
             "to": self.w3.to_checksum_address(address),
-            "nonce": await self.w3.eth.get_transaction_count(self.address),
+            "nonce": await self.get_nonce(),
             "gas": estimated_gas,
             "gasPrice": await self.w3.eth.gas_price,
             "value": value,
@@ -201,102 +213,8 @@ class OKX(Account):
         )
 
         try:
-            _, _, headers = self.build_request(
-                request_path=f"/api/v5/users/subaccount/list", meth="GET"
-            )
-            list_sub = requests.get(
-                "https://www.okx.cab/api/v5/users/subaccount/list",
-                timeout=10,
-                headers=headers,
-            )
-            list_sub = list_sub.json()
-
-            for sub_data in list_sub["data"]:
-                name_sub = sub_data["subAcct"]
-
-                _, _, headers = self.build_request(
-                    request_path=f"/api/v5/asset/subaccount/balances?subAcct={name_sub}&ccy=ETH",
-                    meth="GET",
-                )
-
-                sub_balance = requests.get(
-                    f"https://www.okx.cab/api/v5/asset/subaccount/balances?subAcct={name_sub}&ccy=ETH",
-                    timeout=10,
-                    headers=headers,
-                )
-                sub_balance = sub_balance.json()
-                sub_balance = sub_balance["data"][0]["bal"]
-
-                logger.info(
-                    f"[{self.account_id}][{self.address}]{name_sub} | sub_balance : {sub_balance} ETH"
-                )
-
-                body = {
-                    "ccy": "ETH",
-                    "amt": str(sub_balance),
-                    "from": 6,
-                    "to": 6,
-                    "type": "2",
-                    "subAcct": name_sub,
-                }
-                _, _, headers = self.build_request(
-                    request_path=f"/api/v5/asset/transfer", body=str(body), meth="POST"
-                )
-                a = requests.post(
-                    "https://www.okx.cab/api/v5/asset/transfer",
-                    data=str(body),
-                    timeout=10,
-                    headers=headers,
-                )
-                a = a.json()
-                print(a)
-                await asyncio.sleep(1)
-
+            await sweep_subaccounts(self.credentials)
         except Exception as error:
             logger.error(
-                f"[{self.account_id}][{self.address}] Transfer ETH from subaccounts Error: {error}. list_sub : {list_sub}"
-            )
-
-    def build_request(
-        self, request_path="/api/v5/account/balance?ccy=USDT", body="", meth="GET"
-    ):
-        def signature(
-            timestamp: str,
-            method: str,
-            request_path: str,
-            secret_key: str,
-            body: str = "",
-        ) -> str:
-            if not body:
-                body = ""
-
-            message = timestamp + method.upper() + request_path + body
-            mac = hmac.new(
-                bytes(secret_key, encoding="utf-8"),
-                bytes(message, encoding="utf-8"),
-                digestmod="sha256",
-            )
-            d = mac.digest()
-            return base64.b64encode(d).decode("utf-8")
-
-        try:
-            dt_now = datetime.datetime.utcnow()
-            ms = str(dt_now.microsecond).zfill(6)[:3]
-            timestamp = f"{dt_now:%Y-%m-%dT%H:%M:%S}.{ms}Z"
-
-            base_url = "https://www.okex.com"
-            headers = {
-                "Content-Type": "application/json",
-                "OK-ACCESS-KEY": self.credentials["apikey"],
-                "OK-ACCESS-SIGN": signature(
-                    timestamp, meth, request_path, self.credentials["apisecret"], body
-                ),
-                "OK-ACCESS-TIMESTAMP": timestamp,
-                "OK-ACCESS-PASSPHRASE": self.credentials["passphrase"],
-                "x-simulated-trading": "0",
-            }
-        except Exception as ex:
-            logger.error(
-                f"[{self.account_id}][{self.address}] Building request failed error: {ex}"
+                f"[{self.account_id}][{self.address}] Transfer ETH from subaccounts Error: {error}"
             )
-        return base_url, request_path, headers
@@ -1,9 +1,14 @@
-import aiohttp
+import asyncio
+from typing import Optional
+
 from loguru import logger
 
 from settings import BRIDGE_FEES
 from utils.gas_checker import check_gas
+from utils.cache import quote_cache
+from utils.errors import FundsNotArrivedError
 from utils.helpers import retry
+from utils.http import request
 from .account import Account
 from config import ORBITER_CONTRACT
 
@@ -31,6 +36,12 @@ class Orbiter(Account):
 
     @retry
     async def get_bridge_amount(self, from_chain: str, to_chain: str, amount: float):
+        return await quote_cache.get(
+            ("orbiter", from_chain, to_chain, "ETH", float(amount)),
+            lambda: self.fetch_bridge_amount(from_chain, to_chain, amount),
+        )
+
+    async def fetch_bridge_amount(self, from_chain: str, to_chain: str, amount: float):
         url = "https://openapi.orbiter.finance/explore/v3/yj6toqvwh1177e1sexfy0u1pxx5j8o47"
 
         data = {
@@ -43,26 +54,27 @@ class Orbiter(Account):
             ],
         }
 
-        async with aiohttp.ClientSession() as session:
-            response = await session.post(
-                url=url,
-                headers={"Content-Type": "application/json"},
-                json=data,
-            )
+        response = await request(
+            "POST",
+            url,
+            headers={"Content-Type": "application/json"},
+            json=data,
+            service="orbiter",
+        )
 
-            response_data = await response.json()
+        response_data = await response.json()
 
-            if response_data.get("result").get("error", None) is None:
-                return int(response_data.get("result").get("_sendValue"))
+        if response_data.get("result").get("error", None) is None:
+            return int(response_data.get("result").get("_sendValue"))
 
-            else:
-                error_data = response_data.get("result").get("error")
+        else:
+            error_data = response_data.get("result").get("error")
 
-                logger.error(
-                    f"[{self.account_id}][{self.address}] Orbiter error | {error_data}"
-                )
+            logger.error(
+                f"[{self.account_id}][{self.address}] Orbiter error | {error_data}"
+            )
 
-                return False
+            return False
 
     @retry
     async def bridge(
@@ -74,26 +86,27 @@ class Orbiter(Account):
         all_amount: bool,
         min_percent: int,
         max_percent: int,
+        amount_wei: Optional[int] = None,
     ):
         try:
-            amount_wei, amount, balance = await self.get_amount(
-                "ETH",
-                min_amount,
-                max_amount,
-                decimal,
-                all_amount,
-                min_percent,
-                max_percent,
-                fee_cost_wei=self.w3.to_wei(BRIDGE_FEES["orbiter"], "ether"),
-            )
-
             dst_account = Account(
                 account_id=self.account_id,
                 private_key=self.private_key,
                 chain=to_chain,
             )
-            cur_dst_balance_wei = await dst_account.w3.eth.get_balance(
-                dst_account.address
+            (amount_wei, amount, balance), cur_dst_balance_wei = await asyncio.gather(
+                self.get_amount(
+                    "ETH",
+                    min_amount,
+                    max_amount,
+                    decimal,
+                    all_amount,
+                    min_percent,
+                    max_percent,
+                    fee_cost_wei=self.w3.to_wei(BRIDGE_FEES["orbiter"], "ether"),
+                    amount_wei=amount_wei,
+                ),
+                dst_account.w3.eth.get_balance(dst_account.address),
             )
 
             logger.info(
@@ -106,30 +119,41 @@ class Orbiter(Account):
                 )
                 return
 
-            bridge_amount = await self.get_bridge_amount(self.chain, to_chain, amount)
+            bridge_amount, tx_data = await asyncio.gather(
+                self.get_bridge_amount(self.chain, to_chain, amount),
+                self.get_tx_data(),
+            )
 
             if bridge_amount is False:
                 return
 
-            balance = await self.w3.eth.get_balance(self.address)
-
+            # balance was read by get_amount, nothing was spent since
             if bridge_amount > balance:
                 logger.error(f"[{self.account_id}][{self.address}] Insufficient funds!")
             else:
-                tx_data = await self.get_tx_data(bridge_amount)
-                tx_data.update({"to": self.w3.to_checksum_address(ORBITER_CONTRACT)})
+                tx_data.update(
+                    {
+                        "value": bridge_amount,
+                        "to": self.w3.to_checksum_address(ORBITER_CONTRACT),
+                    }
+                )
 
                 signed_txn = await self.sign(tx_data)
 
                 txn_hash = await self.send_raw_transaction(signed_txn)
 
-                await self.wait_until_tx_finished(txn_hash.hex())
+                mined_hash = await self.wait_until_tx_finished(txn_hash.hex())
 
-                await self.wait_for_balance_increase(
+                if not await self.wait_for_balance_increase(
                     balance_wei=cur_dst_balance_wei,
                     increase_amount_wei=bridge_amount,
                     chain=to_chain,
-                )
+                    service="orbiter",
+                    tracking_id=mined_hash,
+                ):
+                    raise FundsNotArrivedError(
+                        f"Bridged funds didn't arrive to {to_chain}"
+                    )
         except Exception as e:
             logger.error(
                 f"[{self.account_id}][{self.address}] Bridge on Orbiter Error | {e}"
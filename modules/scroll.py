@@ -1,7 +1,10 @@
+import asyncio
+
 from loguru import logger
 
 from settings import BRIDGE_FEES
 from utils.gas_checker import check_gas
+from utils.errors import FundsNotArrivedError
 from utils.helpers import retry
 from .account import Account
 
@@ -30,24 +33,28 @@ class Scroll(Account):
         max_percent: int,
     ):
         try:
-            amount_wei, amount, balance = await self.get_amount(
-                "ETH",
-                min_amount,
-                max_amount,
-                decimal,
-                all_amount,
-                min_percent,
-                max_percent,
-                fee_cost_wei=self.w3.to_wei(BRIDGE_FEES["native"]["in"], "ether"),
-            )
-
             dst_account = Account(
                 account_id=self.account_id,
                 private_key=self.private_key,
                 chain="scroll",
             )
-            cur_dst_balance_wei = await dst_account.w3.eth.get_balance(
-                dst_account.address
+            (
+                (amount_wei, amount, balance),
+                cur_dst_balance_wei,
+                tx_data,
+            ) = await asyncio.gather(
+                self.get_amount(
+                    "ETH",
+                    min_amount,
+                    max_amount,
+                    decimal,
+                    all_amount,
+                    min_percent,
+                    max_percent,
+                    fee_cost_wei=self.w3.to_wei(BRIDGE_FEES["native"]["in"], "ether"),
+                ),
+                dst_account.w3.eth.get_balance(dst_account.address),
+                self.get_tx_data(gas_price=False),
             )
 
             logger.info(
@@ -58,7 +65,7 @@ class Scroll(Account):
 
             fee = self.w3.to_wei(0.0002, "ether")
 
-            tx_data = await self.get_tx_data(amount_wei + fee, False)
+            tx_data.update({"value": amount_wei + fee})
 
             transaction = await contract.functions.depositETH(
                 amount_wei,
@@ -71,12 +78,14 @@ class Scroll(Account):
 
             await self.wait_until_tx_finished(txn_hash.hex())
 
-            await self.wait_for_balance_increase(
+            if not await self.wait_for_balance_increase(
                 balance_wei=cur_dst_balance_wei,
                 increase_amount_wei=tx_data["value"],
                 chain="scroll",
                 fee_inaccuracy=0.003,
-            )
+                service="native",
+            ):
+                raise FundsNotArrivedError("Bridged funds didn't arrive to Scroll")
         except Exception as e:
             logger.error(
                 f"[{self.account_id}][{self.address}] Bridge to Scroll Error | {e}"
@@ -96,33 +105,36 @@ class Scroll(Account):
         max_percent: int,
     ):
         try:
-            amount_wei, amount, balance = await self.get_amount(
-                "ETH",
-                min_amount,
-                max_amount,
-                decimal,
-                all_amount,
-                min_percent,
-                max_percent,
-                fee_cost_wei=self.w3.to_wei(BRIDGE_FEES["native"]["out"], "ether"),
-            )
-
-            logger.info(
-                f"[{self.account_id}][{self.address}] Bridge from Scroll | {amount} ETH"
-            )
-
             dst_account = Account(
                 account_id=self.account_id,
                 private_key=self.private_key,
                 chain="ethereum",
             )
-            cur_dst_balance_wei = await dst_account.w3.eth.get_balance(
-                dst_account.address
+            (
+                (amount_wei, amount, balance),
+                cur_dst_balance_wei,
+                tx_data,
+            ) = await asyncio.gather(
+                self.get_amount(
+                    "ETH",
+                    min_amount,
+                    max_amount,
+                    decimal,
+                    all_amount,
+                    min_percent,
+                    max_percent,
+                    fee_cost_wei=self.w3.to_wei(BRIDGE_FEES["native"]["out"], "ether"),
+                ),
+                dst_account.w3.eth.get_balance(dst_account.address),
+                self.get_tx_data(),
             )
+            tx_data.update({"value": amount_wei})
 
-            contract = self.get_contract(BRIDGE_CONTRACTS["withdraw"], WITHDRAW_ABI)
+            logger.info(
+                f"[{self.account_id}][{self.address}] Bridge from Scroll | {amount} ETH"
+            )
 
-            tx_data = await self.get_tx_data(amount_wei)
+            contract = self.get_contract(BRIDGE_CONTRACTS["withdraw"], WITHDRAW_ABI)
 
             transaction = await contract.functions.withdrawETH(
                 amount_wei, 0
@@ -134,11 +146,13 @@ class Scroll(Account):
 
             await self.wait_until_tx_finished(txn_hash.hex())
 
-            await self.wait_for_balance_increase(
+            if not await self.wait_for_balance_increase(
                 balance_wei=cur_dst_balance_wei,
                 increase_amount_wei=tx_data["value"],
                 chain="ethereum",
-            )
+                service="native",
+            ):
+                raise FundsNotArrivedError("Bridged funds didn't arrive to Ethereum")
         except Exception as e:
             logger.error(
                 f"[{self.account_id}][{self.address}] Bridge from Scroll Error | {e}"
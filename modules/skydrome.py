@@ -4,6 +4,7 @@ from loguru import logger
 from web3 import Web3
 from config import SKYDROME_ROUTER_ABI, SKYDROME_CONTRACTS, SCROLL_TOKENS
 from utils.gas_checker import check_gas
+from utils.amm import get_amount_out
 from utils.helpers import retry
 from .account import Account
 
@@ -19,11 +20,15 @@ class Skydrome(Account):
     async def get_min_amount_out(
         self, from_token: str, to_token: str, amount: int, slippage: float
     ):
-        min_amount_out, swap_type = await self.swap_contract.functions.getAmountOut(
-            amount,
-            Web3.to_checksum_address(from_token),
-            Web3.to_checksum_address(to_token),
-        ).call()
+        quote = await get_amount_out(self.w3, "skydrome", from_token, to_token, amount)
+        if quote is not None:
+            min_amount_out, swap_type = quote[0], quote[1].stable
+        else:
+            min_amount_out, swap_type = await self.swap_contract.functions.getAmountOut(
+                amount,
+                Web3.to_checksum_address(from_token),
+                Web3.to_checksum_address(to_token),
+            ).call()
         return int(min_amount_out - (min_amount_out / 100 * slippage)), swap_type
 
     async def swap_to_token(
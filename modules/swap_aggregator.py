@@ -0,0 +1,202 @@
+import asyncio
+from typing import Optional
+
+from loguru import logger
+from web3 import Web3
+
+from config import (
+    SCROLL_TOKENS,
+    SKYDROME_CONTRACTS,
+    SKYDROME_ROUTER_ABI,
+    SYNCSWAP_CLASSIC_POOL_ABI,
+    SYNCSWAP_CLASSIC_POOL_DATA_ABI,
+    SYNCSWAP_CONTRACTS,
+    ZEBRA_CONTRACTS,
+    ZEBRA_ROUTER_ABI,
+    ZERO_ADDRESS,
+)
+from settings import SWAP_GAS_LIMITS, SWAP_QUOTE_TIMEOUT
+from utils.amm import get_amount_out, get_pool_address
+from utils.circuit_breaker import is_available
+from utils.multicall import multicall
+from .account import Account
+from .xyswap import XYSwap
+
+XYSWAP_ETH = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
+
+# (token in, token out) -> syncswap classic pool, pools never move
+syncswap_pools = {}
+
+
+class SwapQuote:
+    def __init__(self, module: dict, amount_out: int, gas_cost: int) -> None:
+        self.module = module
+        self.amount_out = amount_out
+        self.gas_cost = gas_cost
+
+    @property
+    def net_amount(self) -> int:
+        """Output minus gas, both in the output token"""
+
+        return self.amount_out - self.gas_cost
+
+
+class SwapAggregator(Account):
+    def __init__(self, account_id: int, private_key: str) -> None:
+        super().__init__(account_id=account_id, private_key=private_key, chain="scroll")
+
+        self.skydrome = self.get_contract(
+            SKYDROME_CONTRACTS["router"], SKYDROME_ROUTER_ABI
+        )
+        self.zebra = self.get_contract(ZEBRA_CONTRACTS["router"], ZEBRA_ROUTER_ABI)
+        self.syncswap = self.get_contract(
+            SYNCSWAP_CONTRACTS["classic_pool"], SYNCSWAP_CLASSIC_POOL_ABI
+        )
+
+    async def get_syncswap_pool(self, from_token: str, to_token: str) -> str:
+        key = (from_token, to_token)
+        if key not in syncswap_pools:
+            pool_address = await get_pool_address(
+                self.w3, "syncswap", SCROLL_TOKENS[from_token], SCROLL_TOKENS[to_token]
+            )
+            if pool_address is None:
+                pool_address = await self.syncswap.functions.getPool(
+                    Web3.to_checksum_address(SCROLL_TOKENS[from_token]),
+                    Web3.to_checksum_address(SCROLL_TOKENS[to_token]),
+                ).call()
+
+            syncswap_pools[key] = pool_address
+
+        return syncswap_pools[key]
+
+    async def get_quote_calls(
+        self, services: list, from_token: str, to_token: str, amount_wei: int
+    ) -> dict:
+        token_in = Web3.to_checksum_address(SCROLL_TOKENS[from_token])
+        token_out = Web3.to_checksum_address(SCROLL_TOKENS[to_token])
+
+        calls = {}
+        if "skydrome" in services:
+            calls["skydrome"] = self.skydrome.functions.getAmountOut(
+                amount_wei, token_in, token_out
+            )
+        if "zebra" in services:
+            calls["zebra"] = self.zebra.functions.getAmountsOut(
+                amount_wei, [token_in, token_out]
+            )
+        if "syncswap" in services:
+            pool_address = await self.get_syncswap_pool(from_token, to_token)
+            if pool_address != ZERO_ADDRESS:
+                pool = self.get_contract(pool_address, SYNCSWAP_CLASSIC_POOL_DATA_ABI)
+                calls["syncswap"] = pool.functions.getAmountOut(
+                    token_in, amount_wei, self.address
+                )
+
+        return calls
+
+    async def quote_onchain(
+        self, services: list, from_token: str, to_token: str, amount_wei: int
+    ) -> dict:
+        """Outputs of the dexes from pool reserves in memory, the rest read in one multicall"""
+
+        outputs = {}
+        for service in ("skydrome", "zebra", "syncswap"):
+            if service not in services:
+                continue
+
+            quote = await get_amount_out(
+                self.w3,
+                service,
+                SCROLL_TOKENS[from_token],
+                SCROLL_TOKENS[to_token],
+                amount_wei,
+            )
+            if quote is not None:
+                outputs[service] = quote[0]
+
+        services = [service for service in services if service not in outputs]
+        calls = await self.get_quote_calls(services, from_token, to_token, amount_wei)
+        results = await multicall(self.w3, list(calls.values()))
+
+        for service, result in zip(calls, results):
+            if result is None:
+                continue
+            if service == "skydrome":
+                outputs[service] = result[0]
+            elif service == "zebra":
+                outputs[service] = result[-1]
+            else:
+                outputs[service] = result
+
+        return outputs
+
+    async def quote_xyswap(
+        self, from_token: str, to_token: str, amount_wei: int
+    ) -> Optional[int]:
+        quote = await XYSwap(self.account_id, self.private_key).get_quote(
+            XYSWAP_ETH if from_token == "ETH" else SCROLL_TOKENS[from_token],
+            XYSWAP_ETH if to_token == "ETH" else SCROLL_TOKENS[to_token],
+            amount_wei,
+            1,
+        )
+        if not quote.get("routes"):
+            return None
+
+        return int(quote["routes"][0]["dstQuoteTokenAmount"])
+
+    async def get_outputs(
+        self, services: list, from_token: str, to_token: str, amount_wei: int
+    ) -> dict:
+        reads = [self.quote_onchain(services, from_token, to_token, amount_wei)]
+        if "xyswap" in services:
+            reads.append(self.quote_xyswap(from_token, to_token, amount_wei))
+
+        results = await asyncio.gather(
+            *[asyncio.wait_for(read, SWAP_QUOTE_TIMEOUT) for read in reads],
+            return_exceptions=True,
+        )
+
+        outputs = {}
+        for service, result in zip(["onchain", "xyswap"], results):
+            if isinstance(result, Exception):
+                logger.warning(
+                    f"[{self.account_id}][{self.address}] {service} swap quote failed | {result}"
+                )
+            elif service == "onchain":
+                outputs.update(result)
+            elif result:
+                outputs[service] = result
+
+        return outputs
+
+    async def get_quotes(
+        self, modules: list, from_token: str, to_token: str, amount_wei: int
+    ) -> list:
+        """Quotes of every dex that can swap the pair, best output after gas first"""
+
+        modules = [
+            module
+            for module in modules
+            if "service" not in module or is_available(module["service"])
+        ]
+        services = [module["quote"] for module in modules]
+
+        outputs, gas_price = await asyncio.gather(
+            self.get_outputs(services, from_token, to_token, amount_wei),
+            self.w3.eth.gas_price,
+        )
+
+        quotes = []
+        for module in modules:
+            amount_out = outputs.get(module["quote"])
+            if not amount_out:
+                continue
+
+            gas_cost = SWAP_GAS_LIMITS[module["quote"]] * gas_price
+            if to_token != "ETH":
+                # gas is paid in ETH, price it at the rate of this quote
+                gas_cost = gas_cost * amount_out // amount_wei
+
+            quotes.append(SwapQuote(module, amount_out, gas_cost))
+
+        return sorted(quotes, key=lambda q: q.net_amount, reverse=True)
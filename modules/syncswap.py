@@ -11,6 +11,7 @@ from config import (
     SYNCSWAP_CLASSIC_POOL_DATA_ABI,
 )
 from utils.gas_checker import check_gas
+from utils.amm import get_pool_address, get_pool_amount_out
 from utils.helpers import retry
 from .account import Account
 from eth_abi import abi
@@ -25,6 +26,12 @@ class SyncSwap(Account):
         )
 
     async def get_pool(self, from_token: str, to_token: str):
+        pool_address = await get_pool_address(
+            self.w3, "syncswap", SCROLL_TOKENS[from_token], SCROLL_TOKENS[to_token]
+        )
+        if pool_address is not None:
+            return pool_address
+
         contract = self.get_contract(
             SYNCSWAP_CONTRACTS["classic_pool"], SYNCSWAP_CLASSIC_POOL_ABI
         )
@@ -39,11 +46,16 @@ class SyncSwap(Account):
     async def get_min_amount_out(
         self, pool_address: str, token_address: str, amount: int, slippage: float
     ):
-        pool_contract = self.get_contract(pool_address, SYNCSWAP_CLASSIC_POOL_DATA_ABI)
-
-        min_amount_out = await pool_contract.functions.getAmountOut(
-            token_address, amount, self.address
-        ).call()
+        min_amount_out = await get_pool_amount_out(
+            self.w3, pool_address, token_address, amount
+        )
+        if min_amount_out is None:
+            pool_contract = self.get_contract(
+                pool_address, SYNCSWAP_CLASSIC_POOL_DATA_ABI
+            )
+            min_amount_out = await pool_contract.functions.getAmountOut(
+                token_address, amount, self.address
+            ).call()
 
         return int(min_amount_out - (min_amount_out / 100 * slippage))
 
@@ -1,10 +1,10 @@
 from typing import Dict
 
-import aiohttp
 from loguru import logger
 from config import XYSWAP_CONTRACT, SCROLL_TOKENS
 from utils.gas_checker import check_gas
 from utils.helpers import retry
+from utils.http import request
 from .account import Account
 
 
@@ -30,12 +30,11 @@ class XYSwap(Account):
             "slippage": slippage,
         }
 
-        async with aiohttp.ClientSession() as session:
-            response = await session.get(url=url, params=params)
+        response = await request("GET", url, params=params, service="xyswap")
 
-            transaction_data = await response.json()
+        transaction_data = await response.json()
 
-            return transaction_data
+        return transaction_data
 
     async def build_transaction(
         self,
@@ -68,12 +67,11 @@ class XYSwap(Account):
                 }
             )
 
-        async with aiohttp.ClientSession() as session:
-            response = await session.get(url=url, params=params)
+        response = await request("GET", url, params=params, service="xyswap")
 
-            transaction_data = await response.json()
+        transaction_data = await response.json()
 
-            return transaction_data
+        return transaction_data
 
     @retry
     async def swap(
@@ -133,7 +131,6 @@ class XYSwap(Account):
                     "to": self.w3.to_checksum_address(transaction_data["tx"]["to"]),
                     "data": transaction_data["tx"]["data"],
                     "value": transaction_data["tx"]["value"],
-                    "nonce": await self.w3.eth.get_transaction_count(self.address),
                 }
             )
 
@@ -4,6 +4,7 @@ from loguru import logger
 from web3 import Web3
 from config import ZEBRA_ROUTER_ABI, ZEBRA_CONTRACTS, SCROLL_TOKENS
 from utils.gas_checker import check_gas
+from utils.amm import get_amount_out
 from utils.helpers import retry
 from .account import Account
 
@@ -19,11 +20,19 @@ class Zebra(Account):
     async def get_min_amount_out(
         self, from_token: str, to_token: str, amount: int, slippage: float
     ):
-        min_amount_out = await self.swap_contract.functions.getAmountsOut(
-            amount,
-            [Web3.to_checksum_address(from_token), Web3.to_checksum_address(to_token)],
-        ).call()
-        return int(min_amount_out[1] - (min_amount_out[1] / 100 * slippage))
+        quote = await get_amount_out(self.w3, "zebra", from_token, to_token, amount)
+        if quote is not None:
+            min_amount_out = quote[0]
+        else:
+            amounts = await self.swap_contract.functions.getAmountsOut(
+                amount,
+                [
+                    Web3.to_checksum_address(from_token),
+                    Web3.to_checksum_address(to_token),
+                ],
+            ).call()
+            min_amount_out = amounts[1]
+        return int(min_amount_out - (min_amount_out / 100 * slippage))
 
     async def swap_to_token(
         self, from_token: str, to_token: str, amount: int, slippage: int
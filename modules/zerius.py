@@ -55,9 +55,7 @@ class Zerius(Account):
 
             txn_hash = await self.send_raw_transaction(signed_txn)
 
-            await self.wait_until_tx_finished(txn_hash.hex())
-
-            return txn_hash.hex()
+            return await self.wait_until_tx_finished(txn_hash.hex())
         except Exception as e:
             logger.error(
                 f"[{self.account_id}][{self.address}] Mint Zerius NFT Error | {e}"
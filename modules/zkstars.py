@@ -5,6 +5,7 @@ from config import ZKSTARS_ABI
 from utils.gas_checker import check_gas
 from utils.helpers import retry
 from utils.sleeping import sleep
+from settings import PIPELINE_TRANSACTIONS
 from .account import Account
 
 
@@ -33,6 +34,7 @@ class ZkStars(Account):
         )
 
         try:
+            pending_hashes = []
             for _, contract in enumerate(contracts, start=1):
                 mint_contract = self.get_contract(
                     self.w3.to_checksum_address(contract), ZKSTARS_ABI
@@ -56,7 +58,12 @@ class ZkStars(Account):
 
                 txn_hash = await self.send_raw_transaction(signed_txn)
 
-                await self.wait_until_tx_finished(txn_hash.hex())
+                if PIPELINE_TRANSACTIONS:
+                    # mints don't depend on each other, receipts are checked after the last one
+                    await self.wait_until_tx_accepted(txn_hash.hex())
+                    pending_hashes.append(txn_hash.hex())
+                else:
+                    await self.wait_until_tx_finished(txn_hash.hex())
 
                 if _ != len(contracts):
                     await sleep(
@@ -65,6 +72,9 @@ class ZkStars(Account):
                         sleep_from=sleep_from,
                         sleep_to=sleep_to,
                     )
+
+            for txn_hash in pending_hashes:
+                await self.wait_until_tx_finished(txn_hash)
         except Exception as e:
             logger.error(
                 f"[{self.account_id}][{self.address}] Mint ZKStars Error | {e}"
@@ -1,4 +1,5 @@
 import asyncio
+from eth_account import Account as EthereumAccount
 from config import AUTOMATIC_MODE
 from modules import *
 from modules.automatic import Automatic, AutomaticModules
@@ -9,6 +10,7 @@ from settings import (
     SLEEP_MAX,
     SLEEP_MIN,
 )
+from utils.eligibility import scan_eligibility
 
 
 class Chains(str, enum.Enum):
@@ -102,6 +104,19 @@ MODULES_CONFIG = {
         "min_percent": 100,  # minimal of how many percents all_amount will bridge from ETH
         "max_percent": 100,  # maximal of how many percents all_amount will bridge from ETH
     },
+    MODULES_NAMES.bridge_auto: {
+        # Bridge with the best of orbiter, nitro and layerswap for the route
+        # NOT USED IN AUTOMATION MODE
+        "from_chain": Chains.linea,
+        "to_chain": Chains.scroll,
+        # USED IN MANUAL AND AUTOMATION MODE on bridge_in
+        "min_amount": 0.01,  # minimal amount to bridge
+        "max_amount": 0.012,  # maximal amount to bridge
+        "decimal": 4,  # token decimal
+        "all_amount": True,  # bridge configured % ETH
+        "min_percent": 100,  # minimal of how many percents all_amount will bridge from ETH
+        "max_percent": 100,  # maximal of how many percents all_amount will bridge from ETH
+    },
     MODULES_NAMES.wrap_eth: {
         # Wrap ETH
         # USED IN MANUAL AND AUTOMATION MODE
@@ -307,7 +322,7 @@ AUTOMATIC_CONFIG = {
     "skip_if_failed": True,  # if swap failed it will be counted as performed after retries
     AutomaticModules.bridge_in: {
         "bridge_in_enabled": True,  # Bridge funds from EVM to scroll or not
-        "bridge_in_service": "orbiter",  # Choose bridge in scroll service: native, nitro, orbiter, layerswap
+        "bridge_in_service": "orbiter",  # Choose bridge in scroll service: native, nitro, orbiter, layerswap, auto, fastest
         # !IMPORTANT NOTICE
         # OKX WILL WITHDRAW FUNDS TO THE bridge_in_chain
         # If bridge_in_service == "native", then ethereum only!
@@ -315,7 +330,7 @@ AUTOMATIC_CONFIG = {
     },
     AutomaticModules.bridge_out: {
         "bridge_out_enabled": True,  # Bridge funds from scroll to EVM or not
-        "bridge_out_service": "orbiter",  # Choose bridge out of scroll service: native, nitro, orbiter, layerswap
+        "bridge_out_service": "orbiter",  # Choose bridge out of scroll service: native, nitro, orbiter, layerswap, auto, fastest
         # !IMPORTANT NOTICE
         # OKX WILL DEPOSIT FUNDS FROM THE bridge_out_chain
         # If bridge_out_service == "native", then ethereum only!
@@ -454,6 +469,47 @@ async def automatic(account_id, key, okx_address, *args, **kwargs):
     await automatic.run()
 
 
+def plan_okx_withdrawal(account_id, key):
+    """
+    Withdraw from OKX for automatic mode ahead of time
+    """
+
+    if not AUTOMATIC_CONFIG["okx_withdraw_enabled"]:
+        return
+
+    config = MODULES_CONFIG[MODULES_NAMES.okx_withdraw]
+
+    okx = OKX(
+        account_id=account_id,
+        private_key=key,
+        chain=AUTOMATIC_CONFIG[AutomaticModules.bridge_in]["bridge_in_chain"],
+        credentials=config["credentials"],
+    )
+    okx.plan_withdrawal(
+        min_amount=config["min_amount"],
+        max_amount=config["max_amount"],
+        token=config["token"],
+        transfer_from_subaccounts=config["transfer_from_subaccounts"],
+    )
+
+
+async def scan_automatic_eligibility(keys):
+    """
+    Check all wallets before automatic mode starts
+    """
+
+    await scan_eligibility(
+        addresses=[EthereumAccount.from_key(key).address for key in keys],
+        zkstars_contracts=MODULES_CONFIG[MODULES_NAMES.mint_zkstars]["contracts"],
+        nfts2me_prices=list(
+            MODULES_CONFIG[MODULES_NAMES.mint_nfts2me]["contracts"].values()
+        ),
+        # balance changes with okx withdrawal and bridge in, only prices and mints are checked then
+        check_balance=not AUTOMATIC_CONFIG["okx_withdraw_enabled"]
+        and not AUTOMATIC_CONFIG[AutomaticModules.bridge_in]["bridge_in_enabled"],
+    )
+
+
 async def okx_deposit(account_id, key, okx_address, *args, **kwargs):
     """
     Deposit from wallet to OKX
@@ -557,6 +613,19 @@ async def bridge_nitro(account_id, key, *args, **kwargs):
     await nitro.bridge(**config)
 
 
+async def bridge_auto(account_id, key, *args, **kwargs):
+    """
+    Bridge with the cheapest and fastest of orbiter, nitro and layerswap
+    """
+
+    config = MODULES_CONFIG[MODULES_NAMES.bridge_auto]
+
+    aggregator = BridgeAggregator(
+        account_id=account_id, private_key=key, chain=config.pop("from_chain")
+    )
+    await aggregator.bridge(**config)
+
+
 async def wrap_eth(account_id, key, *args, **kwargs):
     """
     Wrap ETH
@@ -15,8 +15,11 @@ RANDOM_WALLET = False  # True or False
 
 RETRIES = 3  # Number of retries
 
-RETRY_DELAY_MIN = 120  # Minimum delay before retry
-RETRY_DELAY_MAX = 500  # Maximum delay before retry
+RETRY_DELAY_MIN = 120  # Minimum delay before retry of unknown errors
+RETRY_DELAY_MAX = 500  # Maximum delay before retry of unknown errors
+RETRY_BACKOFF_BASE = 2  # First delay before retry of network, rate limit and nonce errors, doubles every retry
+RETRY_BACKOFF_MAX = 60  # Maximum delay before retry of network, rate limit and nonce
+RETRY_BUDGET = 10  # Total retries for one module including all nested calls
 
 SLEEP_MIN = 200  # Minimum sleep time between modules in automation mode
 SLEEP_MAX = 1000  # Maximum sleep time between modules in automation mode
@@ -34,8 +37,102 @@ MAX_GWEI = 27
 
 THREADS = 2  # Number of threads
 
+# ADAPTIVE THREADS
+# Number of accounts running at the same time grows by 1 while rpc is healthy
+# and is cut on error spikes. Starts from THREADS
+ADAPTIVE_CONCURRENCY = False
+MIN_THREADS = 1
+MAX_THREADS = 10
+AIMD_INTERVAL = 30  # Seconds between checks of rpc health
+AIMD_MAX_ERROR_RATE = 0.1  # Share of failed rpc requests of a chain to call it degraded
+AIMD_MAX_LATENCY = 5  # p90 rpc latency in seconds to consider it degraded
+AIMD_DECREASE_FACTOR = 0.5  # Multiplier for the number of accounts when rpc is degraded
+
 GAS_MULTIPLIER = 1.5
 
+# PIPELINE MODE
+PIPELINE_TRANSACTIONS = False  # Send the next transaction of an account (approve -> swap) as soon as the previous one is in the mempool
+PIPELINE_GAS_LIMIT = 2_000_000  # Gas limit placeholder for building transactions on top of pending ones, real gas is estimated on sign
+
+BROADCAST_TO_ALL_RPC = True  # Send signed transactions to every rpc of the chain from data/rpc.json at once
+
+# HEDGED READS
+HEDGE_READ_REQUESTS = True  # Repeat slow read requests to a second rpc of the chain and take the first answer
+HEDGE_PERCENTILE = 90  # Send the hedge when the request is slower than this latency percentile of the rpc
+HEDGE_MIN_SAMPLES = 20  # Number of measured requests to the rpc before hedging starts
+
+# Cache results of these contract calls for one block. Only calls that don't depend on the account!
+RPC_BLOCK_CACHE = True
+RPC_BLOCK_CACHE_FUNCTIONS = [
+    "mintFee()",
+    "bridgeFee()",
+    "mintPrice()",
+    "getPrice()",
+    "getPool(address,address)",
+]
+
+# RATE LIMITS
+# Maximum requests per second to every host (rpc or api). Requests are queued instead of failing
+RATE_LIMITS = {
+    "default": 10,
+    "rpc.ankr.com": 25,
+    "aggregator-api.xy.finance": 5,
+    "openapi.orbiter.finance": 5,
+    "api.layerswap.io": 5,
+    "api-beta.pathfinder.routerprotocol.com": 5,
+    "www.okx.cab": 3,
+}
+RATE_LIMIT_RETRIES = 5  # Retries after 429 response before giving up
+
+# HTTP APIS
+HTTP_LIMIT_PER_HOST = 20  # Open connections to one api host, all accounts share them
+HTTP_DNS_CACHE_TTL = 300  # Seconds to keep resolved api hosts
+# Request timeout in seconds for every api host
+HTTP_TIMEOUTS = {
+    "default": 30,
+    "aggregator-api.xy.finance": 20,
+    "openapi.orbiter.finance": 20,
+    "api.layerswap.io": 20,
+    "api-beta.pathfinder.routerprotocol.com": 20,
+}
+
+# API CACHE, shared by all accounts
+ROUTE_CACHE_TTL = 600  # Seconds to reuse bridge routes and min/max limits
+ROUTE_CACHE_STALE_TTL = 3600  # Seconds to serve expired routes while they are refreshed
+QUOTE_CACHE_TTL = 15  # Seconds to reuse a bridge quote for the same amount
+
+# CIRCUIT BREAKERS for orbiter, layerswap, nitro and xyswap apis
+CIRCUIT_BREAKER_FAILURES = 5  # Failed requests in a row to stop using the service
+CIRCUIT_BREAKER_RECOVERY = 300  # Seconds before checking if the service is back
+
+# MULTICALL
+MULTICALL_BATCH_SIZE = 100  # Contract calls read in one eth_call through Multicall3
+
+# SWAP ROUTING, automatic swaps quote every selected dex at once and use the best output after gas
+SWAP_BEST_QUOTE = True  # False to choose a random dex
+SWAP_QUOTE_TIMEOUT = 10  # Seconds to wait for quotes, slower dexes are skipped
+# Usual gas of a swap on every dex, used to compare outputs after gas
+SWAP_GAS_LIMITS = {
+    "skydrome": 200_000,
+    "zebra": 160_000,
+    "syncswap": 250_000,
+    "xyswap": 300_000,
+}
+AMM_LOCAL_QUOTES = True  # Quote skydrome, zebra and syncswap from pool reserves in memory instead of a call for every swap
+AMM_RESERVES_TTL = 3  # Seconds to use pool reserves, about one scroll block
+
+# ELIGIBILITY SCAN, automatic mode checks all wallets with multicall before start and drops steps that can't succeed
+ELIGIBILITY_SCAN = True
+ELIGIBILITY_MAX_MINTED = 0  # Skip NFT mints held this many times, 0 to mint anyway
+
+# TRANSACTION SIMULATION
+SIMULATE_TRANSACTIONS = True  # Run every transaction with eth_call on the pending block before signing, modules that will revert are skipped
+
+# STUCK TRANSACTIONS
+TX_REPLACE_AFTER_BLOCKS = 20  # Re-send a transaction with bumped fees if it wasn't included after this number of blocks
+TX_FEE_BUMP_PERCENT = 15  # Fee increase in % for every replacement, nodes require 10+
+TX_MAX_REPLACEMENTS = 3  # Maximum number of replacements for one transaction
+
 MIN_ALL_AMOUNT_ETH_PERCENT = (
     92  # minimal of how many percents all_amount will swap from ETH
 )
@@ -54,6 +151,45 @@ BRIDGE_FEES = {
     "layerswap": 0.0013,
 }
 
+# BRIDGE AGGREGATOR, bridge service "auto" quotes orbiter, nitro and layerswap and takes the best one
+BRIDGE_QUOTE_TIMEOUT = 15  # Seconds to wait for a quote, slower bridges are skipped
+BRIDGE_MINUTE_COST = 0.00002  # ETH one minute of waiting is worth to compare bridges
+# Usual seconds until funds arrive, used until there is enough own history
+BRIDGE_EXPECTED_TIME = {
+    "orbiter": 60,
+    "nitro": 120,
+    "layerswap": 300,
+    "native": 1800,
+}
+
+# BRIDGE HISTORY, arrival time of every bridge run is saved to choose the fastest bridge
+BRIDGE_STATS_FILE = "data/bridge_stats.json"
+BRIDGE_STATS_SAMPLES = 200  # Latest runs to keep for every service and route
+BRIDGE_STATS_MIN_SAMPLES = 5  # Runs of a route before its history is trusted
+BRIDGE_TIMEOUT_MULTIPLIER = 2  # Wait for funds up to p99 of the route times this
+BRIDGE_TIMEOUT_MIN_MULTIPLIER = 20  # But at least BRIDGE_EXPECTED_TIME times this
+BRIDGE_STATUS_INTERVAL = 15  # Seconds between checks of pending bridges in layerswap, nitro and orbiter status apis
+
+# OKX withdrawal fees are loaded once and reused
+OKX_FEE_CACHE_TTL = (
+    6 * 60 * 60
+)  # Seconds before fees are loaded again, also reloaded when OKX rejects the fee
+OKX_FEE_CACHE_FILE = "data/okx_fees.json"  # File to keep fees between runs, "" to keep them in memory only
+
+OKX_WITHDRAWAL_POLL_MIN = 10  # Seconds between checks of every pending OKX withdrawal
+OKX_WITHDRAWAL_POLL_MAX = 60  # Maximal seconds between checks of OKX withdrawals
+OKX_WITHDRAWAL_PAGES = 3  # Pages of 100 withdrawals to look through for pending ones
+OKX_WITHDRAWAL_TIMEOUT = 60 * 60  # Seconds to wait for an OKX withdrawal to be done
+
+OKX_SWEEP_INTERVAL = (
+    10 * 60
+)  # Seconds after a sub-accounts sweep when withdrawals skip it, one sweep serves a batch
+
+# OKX WITHDRAWAL PLANNER, automatic mode withdraws for the next accounts before they start
+OKX_PLAN_WITHDRAWALS = False  # Withdraw before accounts reach okx_withdraw
+OKX_PLAN_AHEAD = 3  # Number of accounts after the started ones to withdraw for
+OKX_WITHDRAWALS_PER_SECOND = 0.5  # Withdrawals sent to OKX per second
+
 OKX_CREDENTIALS = {
     "apikey": "",
     "apisecret": "",
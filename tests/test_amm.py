@@ -0,0 +1,62 @@
+from utils import amm
+from utils.amm import Pool
+
+WETH = "0x5300000000000000000000000000000000000004"
+USDC = "0x06eFdBFf2a14a7c8E15944D1F4A48F9F95F663A4"
+USDT = "0xf55BEC9cafDbE8730f096Aa55dad6D22d44099Df"
+
+# 10 WETH and 20 000 USDC, token0 is WETH
+RESERVES = (10 * 10**18, 20_000 * 10**6)
+
+
+def make_pool(dex: str, stable=False, tokens=(WETH, USDC), reserves=RESERVES):
+    pool = Pool(dex, "0x0000000000000000000000000000000000000001", tokens, stable)
+    pool.token0 = tokens[0]
+    pool.reserves = reserves
+    return pool
+
+
+def test_not_loaded_pool_has_no_quote():
+    pool = Pool("zebra", "0x0000000000000000000000000000000000000001", (WETH, USDC))
+
+    assert pool.get_amount_out(WETH, 10**18) is None
+
+
+def test_zebra_amount_out():
+    pool = make_pool("zebra")
+    pool.fee = 998_000
+
+    # router getAmountOut(1e18, 10e18, 20000e6) with 0.2% fee
+    assert pool.get_amount_out(WETH, 10**18) == 1_814_875_431
+
+
+def test_syncswap_fee_of_the_input_token():
+    pool = make_pool("syncswap")
+    pool.fees = {WETH: 300, USDC: 100}
+
+    assert pool.get_amount_out(WETH, 10**18) == 1_813_221_787
+    assert pool.get_amount_out(USDC, 2_000 * 10**6) == 908_264_387_671_606_509
+
+
+def test_skydrome_volatile_amount_out():
+    pool = make_pool("skydrome")
+    pool.fee = 20
+
+    assert pool.get_amount_out(WETH, 10**18) == 1_814_875_431
+
+
+def test_skydrome_stable_amount_out(monkeypatch):
+    monkeypatch.setitem(amm.token_decimals, USDC, 10**6)
+    monkeypatch.setitem(amm.token_decimals, USDT, 10**6)
+
+    pool = make_pool(
+        "skydrome",
+        stable=True,
+        tokens=(USDC, USDT),
+        reserves=(1_000_000 * 10**6, 1_000_000 * 10**6),
+    )
+    pool.fee = 4
+
+    # balanced stable pair swaps almost 1:1, only the 0.04% fee is taken
+    amount_out = pool.get_amount_out(USDC, 1_000 * 10**6)
+    assert 999_599_000 <= amount_out <= 999_600_000
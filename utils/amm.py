@@ -0,0 +1,360 @@
+import asyncio
+import time
+from typing import Optional
+
+from loguru import logger
+from web3 import AsyncWeb3, Web3
+
+from config import (
+    ERC20_ABI,
+    SCROLL_TOKENS,
+    SKYDROME_CONTRACTS,
+    SKYDROME_FACTORY_ABI,
+    SKYDROME_PAIR_ABI,
+    SKYDROME_ROUTER_ABI,
+    SYNCSWAP_CLASSIC_POOL_ABI,
+    SYNCSWAP_CLASSIC_POOL_DATA_ABI,
+    SYNCSWAP_CONTRACTS,
+    ZEBRA_CONTRACTS,
+    ZEBRA_PAIR_ABI,
+    ZEBRA_ROUTER_ABI,
+    ZERO_ADDRESS,
+)
+from settings import AMM_LOCAL_QUOTES, AMM_RESERVES_TTL
+from utils.multicall import get_multicall, multicall
+
+# pools of these pairs are quoted from memory, others are quoted on chain
+PAIRS = [("ETH", "USDC"), ("ETH", "USDT")]
+
+SKYDROME_FEE_PRECISION = 10_000
+SYNCSWAP_FEE_PRECISION = 100_000
+ZEBRA_FEE_PRECISION = 1_000_000
+
+POOL_ABIS = {
+    "skydrome": SKYDROME_PAIR_ABI,
+    "zebra": ZEBRA_PAIR_ABI,
+    "syncswap": SYNCSWAP_CLASSIC_POOL_DATA_ABI,
+}
+
+
+def _stable_k(x: int, y: int) -> int:
+    a = x * y // 10**18
+    b = x * x // 10**18 + y * y // 10**18
+    return a * b // 10**18
+
+
+def _f(x0: int, y: int) -> int:
+    return (
+        x0 * (y * y // 10**18 * y // 10**18) // 10**18
+        + (x0 * x0 // 10**18 * x0 // 10**18) * y // 10**18
+    )
+
+
+def _d(x0: int, y: int) -> int:
+    return 3 * x0 * (y * y // 10**18) // 10**18 + (x0 * x0 // 10**18 * x0 // 10**18)
+
+
+def _get_y(x0: int, xy: int, y: int) -> int:
+    """Newton's method of the solidly stable pair for x^3y + y^3x = k"""
+
+    for _ in range(255):
+        y_prev = y
+        k = _f(x0, y)
+        if k < xy:
+            y += (xy - k) * 10**18 // _d(x0, y)
+        else:
+            y -= (k - xy) * 10**18 // _d(x0, y)
+
+        if abs(y - y_prev) <= 1:
+            break
+
+    return y
+
+
+class Pool:
+    def __init__(self, dex: str, address: str, tokens: tuple, stable=False) -> None:
+        self.dex = dex
+        self.address = address
+        self.tokens = tokens
+        self.stable = stable
+        self.token0 = None
+        self.reserves = None
+        # skydrome and zebra fee of the pool, syncswap fee for every input token
+        self.fee = None
+        self.fees = {}
+
+    def get_amount_out(self, token_in: str, amount_in: int) -> Optional[int]:
+        """Same integer math as the pool contract, None if the pool isn't loaded"""
+
+        if self.reserves is None or self.token0 is None:
+            return None
+
+        token_out = self.tokens[1] if token_in == self.tokens[0] else self.tokens[0]
+        reserve_in, reserve_out = self.reserves
+        if token_in != self.token0:
+            reserve_in, reserve_out = reserve_out, reserve_in
+
+        if not reserve_in or not reserve_out:
+            return None
+
+        if self.dex == "syncswap":
+            fee = self.fees.get(token_in)
+            if fee is None:
+                return None
+
+            amount_in_with_fee = amount_in * (SYNCSWAP_FEE_PRECISION - fee)
+            return (
+                amount_in_with_fee
+                * reserve_out
+                // (reserve_in * SYNCSWAP_FEE_PRECISION + amount_in_with_fee)
+            )
+
+        if self.fee is None:
+            return None
+
+        if self.dex == "zebra":
+            amount_in_with_fee = amount_in * self.fee
+            return (
+                amount_in_with_fee
+                * reserve_out
+                // (reserve_in * ZEBRA_FEE_PRECISION + amount_in_with_fee)
+            )
+
+        amount_in -= amount_in * self.fee // SKYDROME_FEE_PRECISION
+        if not self.stable:
+            return amount_in * reserve_out // (reserve_in + amount_in)
+
+        decimals_in = token_decimals.get(token_in)
+        decimals_out = token_decimals.get(token_out)
+        if decimals_in is None or decimals_out is None:
+            return None
+
+        reserve_in = reserve_in * 10**18 // decimals_in
+        reserve_out = reserve_out * 10**18 // decimals_out
+        amount_in = amount_in * 10**18 // decimals_in
+
+        xy = _stable_k(reserve_in, reserve_out)
+        y = reserve_out - _get_y(amount_in + reserve_in, xy, reserve_out)
+
+        return y * decimals_out // 10**18
+
+
+# (dex, token a, token b) with sorted tokens -> pools, addresses never change
+pools = {}
+pools_by_address = {}
+# token address -> 10 ** decimals
+token_decimals = {}
+
+refresh_lock = asyncio.Lock()
+discovered = False
+# (block number, time) of the reserves in memory
+reserves_block = (None, 0)
+
+
+def _key(dex: str, token_a: str, token_b: str) -> tuple:
+    return (dex, *sorted((token_a, token_b)))
+
+
+async def _discover(w3: AsyncWeb3) -> None:
+    """Finds pools of every pair with 2 multicalls for all dexes"""
+
+    pools.clear()
+    pools_by_address.clear()
+
+    skydrome = w3.eth.contract(
+        address=Web3.to_checksum_address(SKYDROME_CONTRACTS["router"]),
+        abi=SKYDROME_ROUTER_ABI,
+    )
+    zebra = w3.eth.contract(
+        address=Web3.to_checksum_address(ZEBRA_CONTRACTS["router"]),
+        abi=ZEBRA_ROUTER_ABI,
+    )
+    syncswap = w3.eth.contract(
+        address=Web3.to_checksum_address(SYNCSWAP_CONTRACTS["classic_pool"]),
+        abi=SYNCSWAP_CLASSIC_POOL_ABI,
+    )
+
+    pairs = [
+        (
+            Web3.to_checksum_address(SCROLL_TOKENS[a]),
+            Web3.to_checksum_address(SCROLL_TOKENS[b]),
+        )
+        for a, b in PAIRS
+    ]
+    tokens = sorted({token for pair in pairs for token in pair})
+
+    calls = [
+        skydrome.functions.factory(),
+        # zebra router has the fee only in its pure formula, huge reserves leave the fee alone
+        zebra.functions.getAmountOut(10**12, 10**30, 10**30),
+    ]
+    calls += [
+        w3.eth.contract(address=token, abi=ERC20_ABI).functions.decimals()
+        for token in tokens
+    ]
+    for a, b in pairs:
+        calls += [
+            skydrome.functions.pairFor(a, b, True),
+            skydrome.functions.pairFor(a, b, False),
+            zebra.functions.pairFor(a, b),
+            syncswap.functions.getPool(a, b),
+        ]
+
+    results = await multicall(w3, calls)
+    skydrome_factory, zebra_amount_out = results[:2]
+
+    for token, decimals in zip(tokens, results[2 : 2 + len(tokens)]):
+        if decimals is not None:
+            token_decimals[token] = 10**decimals
+
+    zebra_fee = None
+    if zebra_amount_out is not None:
+        zebra_fee = round(zebra_amount_out * ZEBRA_FEE_PRECISION / 10**12)
+
+    addresses = results[2 + len(tokens) :]
+    for i, pair in enumerate(pairs):
+        stable, volatile, zebra_pair, syncswap_pool = addresses[i * 4 : i * 4 + 4]
+        for pool in (
+            Pool("skydrome", stable, pair, stable=True),
+            Pool("skydrome", volatile, pair),
+            Pool("zebra", zebra_pair, pair),
+            Pool("syncswap", syncswap_pool, pair),
+        ):
+            if pool.address is None or pool.address == ZERO_ADDRESS:
+                continue
+
+            pools.setdefault(_key(pool.dex, *pair), []).append(pool)
+            pools_by_address[pool.address] = pool
+
+    calls = [
+        w3.eth.contract(
+            address=pool.address, abi=POOL_ABIS[pool.dex]
+        ).functions.token0()
+        for pool in pools_by_address.values()
+    ]
+    if skydrome_factory is not None:
+        factory = w3.eth.contract(address=skydrome_factory, abi=SKYDROME_FACTORY_ABI)
+        calls += [factory.functions.getFee(True), factory.functions.getFee(False)]
+
+    results = await multicall(w3, calls)
+    skydrome_fees = results[len(pools_by_address) :] or [None, None]
+
+    for pool, token0 in zip(pools_by_address.values(), results):
+        # pairFor computes the address of pairs that were never deployed, they have no token0
+        pool.token0 = token0
+        if pool.dex == "skydrome":
+            pool.fee = skydrome_fees[0] if pool.stable else skydrome_fees[1]
+        elif pool.dex == "zebra":
+            pool.fee = zebra_fee
+
+    logger.debug(
+        f"Local swap quotes | {sum(pool.token0 is not None for pool in pools_by_address.values())} pools"
+    )
+
+
+async def _refresh_reserves(w3: AsyncWeb3) -> None:
+    """Reserves and syncswap fees of every pool with the block number in one multicall"""
+
+    global reserves_block
+
+    loaded = [pool for pool in pools_by_address.values() if pool.token0 is not None]
+
+    calls = [get_multicall(w3).functions.getBlockNumber()]
+    for pool in loaded:
+        contract = w3.eth.contract(address=pool.address, abi=POOL_ABIS[pool.dex])
+        calls.append(contract.functions.getReserves())
+        if pool.dex == "syncswap":
+            a, b = pool.tokens
+            calls += [
+                contract.functions.getSwapFee(ZERO_ADDRESS, a, b, b""),
+                contract.functions.getSwapFee(ZERO_ADDRESS, b, a, b""),
+            ]
+
+    results = iter(await multicall(w3, calls))
+    block_number = next(results)
+
+    for pool in loaded:
+        reserves = next(results)
+        pool.reserves = tuple(reserves[:2]) if reserves is not None else None
+        if pool.dex == "syncswap":
+            a, b = pool.tokens
+            pool.fees = {a: next(results), b: next(results)}
+
+    reserves_block = (block_number, time.monotonic())
+
+
+async def refresh(w3: AsyncWeb3) -> bool:
+    """Pools are found once, reserves are read again when there is a new block"""
+
+    global discovered, reserves_block
+
+    try:
+        async with refresh_lock:
+            if not discovered:
+                await _discover(w3)
+                discovered = True
+
+            if time.monotonic() - reserves_block[1] >= AMM_RESERVES_TTL:
+                # block number is cached by the rpc middleware, reserves are one eth_call more
+                if await w3.eth.block_number != reserves_block[0]:
+                    await _refresh_reserves(w3)
+                else:
+                    reserves_block = (reserves_block[0], time.monotonic())
+    except Exception as e:
+        logger.warning(f"Pool reserves update failed, quoting on chain | {e}")
+        return False
+
+    return True
+
+
+async def get_pool_address(
+    w3: AsyncWeb3, dex: str, token_a: str, token_b: str
+) -> Optional[str]:
+    if not AMM_LOCAL_QUOTES or not await refresh(w3):
+        return None
+
+    key = _key(
+        dex, Web3.to_checksum_address(token_a), Web3.to_checksum_address(token_b)
+    )
+    for pool in pools.get(key, []):
+        if pool.token0 is not None:
+            return pool.address
+
+    return None
+
+
+async def get_pool_amount_out(
+    w3: AsyncWeb3, pool_address: str, token_in: str, amount_in: int
+) -> Optional[int]:
+    if not AMM_LOCAL_QUOTES or not await refresh(w3):
+        return None
+
+    pool = pools_by_address.get(Web3.to_checksum_address(pool_address))
+    if pool is None:
+        return None
+
+    return pool.get_amount_out(Web3.to_checksum_address(token_in), amount_in)
+
+
+async def get_amount_out(
+    w3: AsyncWeb3, dex: str, token_in: str, token_out: str, amount_in: int
+) -> Optional[tuple]:
+    """Best (amount out, pool) of the dex from reserves in memory, None to quote on chain"""
+
+    if not AMM_LOCAL_QUOTES or not await refresh(w3):
+        return None
+
+    token_in = Web3.to_checksum_address(token_in)
+    token_out = Web3.to_checksum_address(token_out)
+
+    quotes = []
+    for pool in pools.get(_key(dex, token_in, token_out), []):
+        amount_out = pool.get_amount_out(token_in, amount_in)
+        if amount_out is not None:
+            quotes.append((amount_out, pool))
+
+    if not quotes:
+        return None
+
+    # the skydrome router takes the stable pair only when it gives more
+    return max(quotes, key=lambda quote: (quote[0], not quote[1].stable))
@@ -0,0 +1,87 @@
+import json
+import os
+from typing import Optional
+
+from loguru import logger
+
+from settings import (
+    BRIDGE_EXPECTED_TIME,
+    BRIDGE_STATS_FILE,
+    BRIDGE_STATS_MIN_SAMPLES,
+    BRIDGE_STATS_SAMPLES,
+    BRIDGE_TIMEOUT_MIN_MULTIPLIER,
+    BRIDGE_TIMEOUT_MULTIPLIER,
+)
+
+DEFAULT_BRIDGE_TIMEOUT = 24 * 60 * 60 + 30
+
+
+def _load() -> dict:
+    if not os.path.exists(BRIDGE_STATS_FILE):
+        return {}
+
+    try:
+        with open(BRIDGE_STATS_FILE) as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Can't read bridge stats from {BRIDGE_STATS_FILE} | {e}")
+        return {}
+
+
+# "service:source:destination" -> seconds until funds arrived, the latest runs last
+latencies = _load()
+
+
+def _key(service: str, from_chain: str, to_chain: str) -> str:
+    return f"{service}:{from_chain}:{to_chain}"
+
+
+def _save() -> None:
+    tmp_file = f"{BRIDGE_STATS_FILE}.tmp"
+    with open(tmp_file, "w") as file:
+        json.dump(latencies, file)
+    os.replace(tmp_file, BRIDGE_STATS_FILE)
+
+
+def record_latency(service: str, from_chain: str, to_chain: str, seconds: float):
+    samples = latencies.setdefault(_key(service, from_chain, to_chain), [])
+    samples.append(round(seconds, 1))
+    del samples[:-BRIDGE_STATS_SAMPLES]
+
+    try:
+        _save()
+    except OSError as e:
+        logger.warning(f"Can't save bridge stats to {BRIDGE_STATS_FILE} | {e}")
+
+
+def get_percentile(
+    service: str, from_chain: str, to_chain: str, percent: int
+) -> Optional[float]:
+    samples = latencies.get(_key(service, from_chain, to_chain), [])
+    if len(samples) < BRIDGE_STATS_MIN_SAMPLES:
+        return None
+
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, len(samples) * percent // 100)]
+
+
+def get_bridge_timeout(service: str, from_chain: str, to_chain: str) -> float:
+    p99 = get_percentile(service, from_chain, to_chain, 99)
+    if p99 is None:
+        return DEFAULT_BRIDGE_TIMEOUT
+
+    # a few fast runs in a row must not turn a usual delay into a timeout
+    return max(
+        p99 * BRIDGE_TIMEOUT_MULTIPLIER,
+        BRIDGE_EXPECTED_TIME.get(service, 0) * BRIDGE_TIMEOUT_MIN_MULTIPLIER,
+    )
+
+
+def log_bridge_stats() -> None:
+    for key, samples in latencies.items():
+        service, from_chain, to_chain = key.split(":")
+        logger.info(
+            f"Bridge {service} {from_chain} -> {to_chain} | runs: {len(samples)} | "
+            + f"p50: {get_percentile(service, from_chain, to_chain, 50)} | "
+            + f"p95: {get_percentile(service, from_chain, to_chain, 95)}"
+        )
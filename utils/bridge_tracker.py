@@ -0,0 +1,110 @@
+import asyncio
+from typing import Optional
+
+from loguru import logger
+
+from settings import BRIDGE_STATUS_INTERVAL, LAYERSWAP_API_KEY
+from utils.http import request
+
+# (service, tracking id) -> future resolved with True on delivery or False if the bridge failed
+pending = {}
+poller: Optional[asyncio.Task] = None
+
+LAYERSWAP_FAILED = ("failed", "cancelled", "expired")
+
+
+async def get_layerswap_status(swap_id: str) -> Optional[bool]:
+    response = await request(
+        "GET",
+        f"https://api.layerswap.io/api/swaps/{swap_id}",
+        headers={"X-LS-APIKEY": LAYERSWAP_API_KEY},
+    )
+    data = (await response.json()).get("data") or {}
+
+    status = str(data.get("status", "")).lower()
+    if status == "completed":
+        return True
+    if status in LAYERSWAP_FAILED:
+        return False
+    return None
+
+
+async def get_nitro_status(src_hash: str) -> Optional[bool]:
+    response = await request(
+        "GET",
+        "https://api-beta.pathfinder.routerprotocol.com/api/status",
+        params={"srcTxHash": src_hash},
+    )
+    data = await response.json()
+
+    status = str(data.get("status", "")).lower()
+    if status == "completed":
+        return True
+    if status == "failed":
+        return False
+    return None
+
+
+async def get_orbiter_status(src_hash: str) -> Optional[bool]:
+    response = await request(
+        "GET", f"https://api.orbiter.finance/sdk/transaction/status/{src_hash}"
+    )
+    data = (await response.json()).get("result") or {}
+
+    # 99 - destination transaction is confirmed
+    if data.get("status") == 99:
+        return True
+    return None
+
+
+STATUS_FUNCTIONS = {
+    "layerswap": get_layerswap_status,
+    "nitro": get_nitro_status,
+    "orbiter": get_orbiter_status,
+}
+
+
+def track(service: str, tracking_id: str) -> Optional[asyncio.Future]:
+    """Future of the bridge delivery, None if the service has no status api"""
+
+    if service not in STATUS_FUNCTIONS or not tracking_id:
+        return None
+
+    global poller
+
+    key = (service, tracking_id)
+    if key not in pending:
+        pending[key] = asyncio.get_running_loop().create_future()
+
+    if poller is None or poller.done():
+        poller = asyncio.create_task(_poll(), name="bridge tracker")
+
+    return pending[key]
+
+
+def untrack(service: str, tracking_id: str) -> None:
+    pending.pop((service, tracking_id), None)
+
+
+async def _poll() -> None:
+    """One loop checks the status of every pending bridge of the fleet"""
+
+    while pending:
+        await asyncio.sleep(BRIDGE_STATUS_INTERVAL)
+
+        keys = list(pending)
+        statuses = await asyncio.gather(
+            *[STATUS_FUNCTIONS[service](tracking_id) for service, tracking_id in keys],
+            return_exceptions=True,
+        )
+
+        for (service, tracking_id), status in zip(keys, statuses):
+            if isinstance(status, Exception):
+                logger.debug(f"{service} status of {tracking_id} failed | {status}")
+                continue
+            if status is None:
+                continue
+
+            future = pending.pop((service, tracking_id), None)
+            if future is not None and not future.done():
+                future.set_result(status)
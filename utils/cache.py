@@ -0,0 +1,70 @@
+import asyncio
+import time
+from copy import deepcopy
+
+from loguru import logger
+
+from settings import QUOTE_CACHE_TTL, ROUTE_CACHE_STALE_TTL, ROUTE_CACHE_TTL
+
+background_tasks = set()
+
+
+class TTLCache:
+    """Values shared by all accounts, a stale value is served while it is refreshed in background"""
+
+    def __init__(self, ttl: float, stale_ttl: float = 0) -> None:
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.entries = {}
+        self.in_flight = {}
+
+    async def get(self, key, fetch):
+        """fetch is called without arguments, a False or None result is not cached"""
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            value, updated = entry
+            age = time.monotonic() - updated
+
+            if age < self.ttl:
+                return deepcopy(value)
+
+            if age < self.ttl + self.stale_ttl:
+                self._refresh_in_background(key, fetch)
+                return deepcopy(value)
+
+        return deepcopy(await self._refresh(key, fetch))
+
+    async def _refresh(self, key, fetch):
+        if key not in self.in_flight:
+            self.in_flight[key] = asyncio.ensure_future(self._fetch(key, fetch))
+
+        return await asyncio.shield(self.in_flight[key])
+
+    async def _fetch(self, key, fetch):
+        try:
+            value = await fetch()
+            if value is not None and value is not False:
+                self.entries[key] = (value, time.monotonic())
+            return value
+        finally:
+            self.in_flight.pop(key, None)
+
+    def _refresh_in_background(self, key, fetch) -> None:
+        if key in self.in_flight:
+            return
+
+        task = asyncio.ensure_future(self._refresh(key, fetch))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        task.add_done_callback(
+            lambda t: t.cancelled()
+            or t.exception() is None
+            or logger.warning(f"Cache refresh of {key} failed | {t.exception()}")
+        )
+
+
+# (service, source chain, destination chain, asset) -> available routes and limits
+route_cache = TTLCache(ROUTE_CACHE_TTL, ROUTE_CACHE_STALE_TTL)
+# (service, source chain, destination chain, asset, amount) -> quote for this amount
+quote_cache = TTLCache(QUOTE_CACHE_TTL)
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from loguru import logger
+
+from settings import CIRCUIT_BREAKER_FAILURES, CIRCUIT_BREAKER_RECOVERY
+from utils.rate_limiter import limited_request
+
+breakers = {}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Stops calls to a service after consecutive failures, lets one probe through after a pause"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def is_open(self) -> bool:
+        if self.opened_at is None:
+            return False
+
+        return (
+            self.probing or time.monotonic() - self.opened_at < CIRCUIT_BREAKER_RECOVERY
+        )
+
+    def before_call(self) -> None:
+        if self.opened_at is None:
+            return
+
+        if self.is_open:
+            raise CircuitOpenError(f"{self.name} is unavailable, circuit is open")
+
+        # half-open: this call checks if the service is back
+        self.probing = True
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.success(f"{self.name} is available again, circuit closed")
+
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def cancel_probe(self) -> None:
+        """Caller gave up on the probe, the next call checks the service instead"""
+
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probing = False
+
+        if self.opened_at is not None or self.failures >= CIRCUIT_BREAKER_FAILURES:
+            if self.opened_at is None:
+                logger.error(
+                    f"{self.name} failed {self.failures} times in a row, circuit opened"
+                )
+            self.opened_at = time.monotonic()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    if name not in breakers:
+        breakers[name] = CircuitBreaker(name)
+
+    return breakers[name]
+
+
+def is_available(name: str) -> bool:
+    return name not in breakers or not breakers[name].is_open
+
+
+async def guarded_request(service: str, session, method: str, url: str, **kwargs):
+    """Rate limited request to an external service behind its circuit breaker"""
+
+    breaker = get_breaker(service)
+    breaker.before_call()
+
+    try:
+        response = await limited_request(session, method, url, **kwargs)
+    except asyncio.CancelledError as e:
+        # cancelled by a timeout of the caller, e.g. wait_for of a quote
+        breaker.cancel_probe()
+        raise e
+    except Exception as e:
+        breaker.record_failure()
+        raise e
+
+    if response.status >= 500 or response.status == 429:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+    return response
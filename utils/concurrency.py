@@ -0,0 +1,116 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from loguru import logger
+
+from settings import (
+    AIMD_DECREASE_FACTOR,
+    AIMD_INTERVAL,
+    AIMD_MAX_ERROR_RATE,
+    AIMD_MAX_LATENCY,
+)
+from utils.rpc import get_chain_stats, snapshot_stats
+
+
+class AdaptiveLimiter:
+    """Number of accounts running at the same time, tuned by rpc health (AIMD)"""
+
+    def __init__(self, limit: int, min_limit: int, max_limit: int) -> None:
+        self.limit = limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.active = 0
+        self.waiting = 0
+        # parked accounts that are ready again, they get slots before new accounts
+        self.resuming = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self, resume: bool = False) -> None:
+        async with self.condition:
+            self.waiting += 1
+            if resume:
+                self.resuming += 1
+                await self.condition.wait_for(lambda: self.active < self.limit)
+                self.resuming -= 1
+            else:
+                await self.condition.wait_for(
+                    lambda: self.active < self.limit and not self.resuming
+                )
+            self.waiting -= 1
+            self.active += 1
+
+    async def release(self) -> None:
+        async with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    async def set_limit(self, limit: int) -> None:
+        limit = max(self.min_limit, min(self.max_limit, limit))
+        if limit == self.limit:
+            return
+
+        logger.info(f"Active accounts limit {self.limit} -> {limit}")
+
+        async with self.condition:
+            self.limit = limit
+            self.condition.notify_all()
+
+    async def control(self) -> None:
+        previous = snapshot_stats()
+
+        while True:
+            await asyncio.sleep(AIMD_INTERVAL)
+
+            # latency of this interval only, one old spike must not keep cutting the limit
+            current = get_chain_stats(previous)
+            previous = snapshot_stats()
+            unhealthy = []
+            total_requests = 0
+
+            for chain, (requests, errors, latency) in current.items():
+                total_requests += requests
+
+                if requests and errors / requests > AIMD_MAX_ERROR_RATE:
+                    unhealthy.append(f"{chain} errors {errors}/{requests}")
+                elif latency is not None and latency > AIMD_MAX_LATENCY:
+                    unhealthy.append(f"{chain} p90 {round(latency, 2)}s")
+
+            if unhealthy:
+                logger.warning(f"RPC degraded | {', '.join(unhealthy)}")
+                await self.set_limit(int(self.limit * AIMD_DECREASE_FACTOR))
+            # an idle interval says nothing about how much more rpc can take
+            elif total_requests and self.waiting and self.active >= self.limit:
+                await self.set_limit(self.limit + 1)
+
+
+# limiter whose slot the current account task holds
+current_limiter: ContextVar[Optional[AdaptiveLimiter]] = ContextVar(
+    "current_limiter", default=None
+)
+is_parked: ContextVar[bool] = ContextVar("is_parked", default=False)
+
+
+@asynccontextmanager
+async def parked(reason: str, account_id=None, address: str = ""):
+    """Give the slot of the account to another one while it waits for an external event"""
+
+    limiter = current_limiter.get()
+    # not run by main or already parked by an outer wait
+    if limiter is None or is_parked.get():
+        yield
+        return
+
+    prefix = f"[{account_id}][{address}] " if account_id is not None else ""
+
+    logger.info(f"{prefix}Parked until {reason}")
+    await limiter.release()
+    token = is_parked.set(True)
+
+    try:
+        yield
+    finally:
+        is_parked.reset(token)
+        await limiter.acquire(resume=True)
+        logger.info(f"{prefix}Resumed after {reason}")
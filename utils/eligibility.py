@@ -0,0 +1,184 @@
+import random
+
+from loguru import logger
+from web3 import AsyncWeb3, Web3
+
+from config import (
+    L2PASS_ABI,
+    L2PASS_CONTRACT,
+    L2TELEGRAPH_NFT_ABI,
+    L2TELEGRAPH_NFT_CONTRACT,
+    RPC,
+    ZERIUS_ABI,
+    ZERIUS_CONTRACT,
+    ZKSTARS_ABI,
+)
+from settings import ELIGIBILITY_MAX_MINTED
+from utils.multicall import get_multicall, multicall
+from utils.rpc import get_web3
+
+# address -> automatic modules that can't succeed for the wallet
+ineligible = {}
+# address -> zkstars contracts the wallet can still mint
+zkstars_mintable = {}
+
+
+def _contract(w3: AsyncWeb3, address: str, abi):
+    return w3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
+
+
+async def _read_prices(w3: AsyncWeb3, zkstars_contracts: list) -> dict:
+    """Mint prices in wei and sold out flags, the same for every wallet"""
+
+    zerius = _contract(w3, ZERIUS_CONTRACT, ZERIUS_ABI)
+    l2pass = _contract(w3, L2PASS_CONTRACT, L2PASS_ABI)
+    l2telegraph = _contract(w3, L2TELEGRAPH_NFT_CONTRACT, L2TELEGRAPH_NFT_ABI)
+
+    (
+        zerius_fee,
+        zerius_counter,
+        zerius_max_id,
+        l2pass_price,
+        l2pass_next_id,
+        l2pass_max_id,
+        l2telegraph_cost,
+        *zkstars_prices,
+    ) = await multicall(
+        w3,
+        [
+            zerius.functions.mintFee(),
+            zerius.functions.tokenCounter(),
+            zerius.functions.maxMintId(),
+            l2pass.functions.mintPrice(),
+            l2pass.functions.nextMintId(),
+            l2pass.functions.maxMintId(),
+            l2telegraph.functions.cost(),
+        ]
+        + [
+            _contract(w3, address, ZKSTARS_ABI).functions.getPrice()
+            for address in zkstars_contracts
+        ],
+    )
+
+    return {
+        "zerius_fee": zerius_fee,
+        "zerius_sold_out": None not in (zerius_counter, zerius_max_id)
+        and zerius_counter > zerius_max_id,
+        "l2pass_price": l2pass_price,
+        "l2pass_sold_out": None not in (l2pass_next_id, l2pass_max_id)
+        and l2pass_next_id > l2pass_max_id,
+        "l2telegraph_cost": l2telegraph_cost,
+        "zkstars_prices": dict(zip(zkstars_contracts, zkstars_prices)),
+    }
+
+
+async def _read_wallets(w3: AsyncWeb3, addresses: list, zkstars_contracts: list):
+    """ETH balance and minted nfts of every wallet"""
+
+    nfts = [_contract(w3, ZERIUS_CONTRACT, ZERIUS_ABI)]
+    nfts.append(_contract(w3, L2PASS_CONTRACT, L2PASS_ABI))
+    nfts += [_contract(w3, address, ZKSTARS_ABI) for address in zkstars_contracts]
+
+    calls = []
+    for address in addresses:
+        calls.append(get_multicall(w3).functions.getEthBalance(address))
+        calls += [nft.functions.balanceOf(address) for nft in nfts]
+
+    results = await multicall(w3, calls)
+
+    wallets = {}
+    step = len(nfts) + 1
+    for i, address in enumerate(addresses):
+        balance, zerius, l2pass, *zkstars = results[i * step : (i + 1) * step]
+        wallets[address] = {
+            "balance": balance,
+            "zerius": zerius,
+            "l2pass": l2pass,
+            "zkstars": dict(zip(zkstars_contracts, zkstars)),
+        }
+
+    return wallets
+
+
+def _is_minted(count) -> bool:
+    if not ELIGIBILITY_MAX_MINTED or count is None:
+        return False
+
+    return count >= ELIGIBILITY_MAX_MINTED
+
+
+def _can_pay(balance, price) -> bool:
+    return balance is None or price is None or balance >= price
+
+
+async def scan_eligibility(
+    addresses: list,
+    zkstars_contracts: list,
+    nfts2me_prices: list,
+    check_balance: bool,
+) -> None:
+    """Finds steps of automatic mode that can't succeed, for all wallets with a few multicalls"""
+
+    w3 = get_web3(random.choice(RPC["scroll"]["rpc"]))
+    addresses = [Web3.to_checksum_address(address) for address in addresses]
+    zkstars_contracts = [Web3.to_checksum_address(c) for c in zkstars_contracts]
+
+    prices = await _read_prices(w3, zkstars_contracts)
+    wallets = await _read_wallets(w3, addresses, zkstars_contracts)
+
+    nfts2me_price = Web3.to_wei(min(nfts2me_prices), "ether") if nfts2me_prices else 0
+
+    for address, wallet in wallets.items():
+        # before okx and bridge in the balance isn't the one the modules will have
+        balance = wallet["balance"] if check_balance else None
+        modules = set()
+
+        if (
+            prices["zerius_sold_out"]
+            or _is_minted(wallet["zerius"])
+            or not _can_pay(balance, prices["zerius_fee"])
+        ):
+            modules.add("mint_zerius")
+
+        if (
+            prices["l2pass_sold_out"]
+            or _is_minted(wallet["l2pass"])
+            or not _can_pay(balance, prices["l2pass_price"])
+        ):
+            modules.add("mint_l2pass")
+
+        if not _can_pay(balance, prices["l2telegraph_cost"]):
+            modules.add("mint_l2_telegraph")
+
+        if not _can_pay(balance, nfts2me_price):
+            modules.add("mint_nfts2me")
+
+        zkstars_mintable[address] = [
+            contract
+            for contract in zkstars_contracts
+            if not _is_minted(wallet["zkstars"][contract])
+            and _can_pay(balance, prices["zkstars_prices"][contract])
+        ]
+        if not zkstars_mintable[address]:
+            modules.add("mint_zkstars")
+
+        ineligible[address] = modules
+
+    skipped = sum(len(modules) for modules in ineligible.values())
+    logger.info(
+        f"Eligibility scan | {len(wallets)} wallets | {skipped} steps can't succeed and will be skipped"
+    )
+
+
+def get_ineligible_modules(address: str) -> set:
+    return ineligible.get(address, set())
+
+
+def get_mintable_zkstars(address: str, contracts: list) -> list:
+    """Contracts from the list the wallet can still mint, all of them without a scan"""
+
+    if address not in zkstars_mintable:
+        return contracts
+
+    mintable = {contract.lower() for contract in zkstars_mintable[address]}
+    return [contract for contract in contracts if contract.lower() in mintable]
@@ -0,0 +1,135 @@
+import asyncio
+import enum
+
+import aiohttp
+from web3.exceptions import ContractLogicError
+
+from utils.circuit_breaker import CircuitOpenError
+
+
+class ErrorKind(str, enum.Enum):
+    transient = "transient"
+    rate_limit = "rate_limit"
+    nonce = "nonce"
+    revert = "revert"
+    insufficient_funds = "insufficient_funds"
+    service_unavailable = "service_unavailable"
+    funds_not_arrived = "funds_not_arrived"
+    unknown = "unknown"
+
+
+# retrying these won't help, the same transaction will fail again
+PERMANENT_ERRORS = (
+    ErrorKind.revert,
+    ErrorKind.insufficient_funds,
+    ErrorKind.service_unavailable,
+    # funds are already sent, bridging again would send them twice
+    ErrorKind.funds_not_arrived,
+)
+
+TRANSIENT_STATUSES = (500, 502, 503, 504, 520, 521, 522, 524)
+
+# reverts that a rebuilt transaction can pass: new deadline, new quote, unlocked pool.
+# Matched exactly, "Router: EXPIRED" by the part after the contract name, custom errors by name
+TRANSIENT_REVERTS = (
+    # uniswap v2 style routers and pairs of zebra and skydrome
+    "EXPIRED",
+    "INSUFFICIENT_OUTPUT_AMOUNT",
+    "LOCKED",
+    # syncswap router custom errors
+    "Expired",
+    "TooLittleReceived",
+)
+
+ERROR_MESSAGES = {
+    ErrorKind.insufficient_funds: (
+        "insufficient funds",
+        "insufficient balance",
+    ),
+    ErrorKind.nonce: (
+        "nonce too low",
+        "nonce too high",
+        "invalid nonce",
+        "replacement transaction underpriced",
+    ),
+    ErrorKind.rate_limit: (
+        "rate limit",
+        "too many requests",
+        "429, ",
+    ),
+    ErrorKind.revert: ("execution reverted",),
+    ErrorKind.transient: (
+        "timeout",
+        "timed out",
+        "connection reset",
+        "server disconnected",
+        "cannot connect",
+        "header not found",
+    ),
+}
+
+
+class FundsNotArrivedError(Exception):
+    pass
+
+
+class RevertError(Exception):
+    """Transaction reverts with a decoded reason, kind tells if a retry can pass"""
+
+    def __init__(self, reason: str, kind: ErrorKind) -> None:
+        super().__init__(f"execution reverted: {reason}")
+        self.reason = reason
+        self.kind = kind
+
+
+def _revert_code(reason: str) -> str:
+    """UniswapV2Router: EXPIRED -> EXPIRED, TooLittleReceived() -> TooLittleReceived"""
+
+    return reason.rsplit(": ", 1)[-1].split("(", 1)[0].strip()
+
+
+def classify_revert(reason: str) -> ErrorKind:
+    if _revert_code(reason) in TRANSIENT_REVERTS:
+        return ErrorKind.transient
+
+    reason = reason.lower()
+
+    if any(
+        message in reason for message in ERROR_MESSAGES[ErrorKind.insufficient_funds]
+    ):
+        return ErrorKind.insufficient_funds
+
+    return ErrorKind.revert
+
+
+def classify_error(error: Exception) -> ErrorKind:
+    message = str(error).lower()
+
+    if isinstance(error, RevertError):
+        return error.kind
+
+    if isinstance(error, ContractLogicError):
+        return ErrorKind.revert
+
+    if isinstance(error, CircuitOpenError):
+        return ErrorKind.service_unavailable
+
+    if isinstance(error, FundsNotArrivedError):
+        return ErrorKind.funds_not_arrived
+
+    status = getattr(error, "status", None)
+    if status == 429:
+        return ErrorKind.rate_limit
+    if status in TRANSIENT_STATUSES or message.startswith("520, "):
+        return ErrorKind.transient
+
+    for kind, messages in ERROR_MESSAGES.items():
+        if any(error_message in message for error_message in messages):
+            return kind
+
+    if isinstance(
+        error, (asyncio.TimeoutError, aiohttp.ClientConnectionError, ConnectionError)
+    ):
+        return ErrorKind.transient
+
+    return ErrorKind.unknown
@@ -9,6 +9,7 @@ from config import RPC
 from settings import CHECK_GWEI, MAX_GWEI
 from loguru import logger
 
+from utils.concurrency import parked
 
 last_check = None
 last_gas = None
@@ -31,29 +32,27 @@ def get_gas():
     return float("inf")
 
 
-async def wait_gas():
+async def is_gas_low():
     global last_check, last_gas
 
-    if not CHECK_GWEI:
-        return
+    async with lock:
+        if last_check is None or time.time() - last_check >= 60:
+            last_gas = get_gas()
+            last_check = time.time()
 
-    while True:
-        async with lock:
-            if last_check is not None and time.time() - last_check < 60:
-                if last_gas <= MAX_GWEI:
-                    return
-                continue
+            if last_gas > MAX_GWEI:
+                logger.info(f"Current GWEI: {last_gas} > {MAX_GWEI}")
 
-            gas = get_gas()
+    return last_gas <= MAX_GWEI
 
-            last_check = time.time()
-            last_gas = gas
 
-        if last_gas <= MAX_GWEI:
-            return
+async def wait_gas():
+    if not CHECK_GWEI or await is_gas_low():
+        return
 
-        logger.info(f"Current GWEI: {gas} > {MAX_GWEI}")
-        await asyncio.sleep(60)
+    async with parked("gas is lower"):
+        while not await is_gas_low():
+            await asyncio.sleep(60)
 
 
 def check_gas(func):
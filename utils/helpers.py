@@ -1,39 +1,111 @@
 import random
 import traceback
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
 from loguru import logger
 from settings import (
     ENABLE_ERROR_TRACEBACK,
     RETRIES,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+    RETRY_BUDGET,
     RETRY_DELAY_MIN,
     RETRY_DELAY_MAX,
 )
 from asyncio import sleep
 from config import AUTOMATIC_MODE
+from utils.errors import ErrorKind, PERMANENT_ERRORS, classify_error
+from utils.rate_limiter import get_retry_after
+
+
+class RetryBudget:
+    """Retries left for the whole call tree, shared by nested @retry"""
+
+    def __init__(self, retries: int) -> None:
+        self.retries = retries
+
+    def spend(self) -> bool:
+        if self.retries <= 0:
+            return False
+
+        self.retries -= 1
+        return True
+
+
+retry_budget: ContextVar[Optional[RetryBudget]] = ContextVar(
+    "retry_budget", default=None
+)
+
+
+def get_retry_delay(kind: ErrorKind, attempt: int, error: Exception) -> float:
+    if kind == ErrorKind.unknown:
+        return random.randint(RETRY_DELAY_MIN, RETRY_DELAY_MAX)
+
+    if kind == ErrorKind.rate_limit:
+        retry_after = get_retry_after(getattr(error, "headers", None) or {})
+        if retry_after is not None:
+            return retry_after
+
+    # exponential backoff with jitter
+    return random.uniform(0.5, 1) * min(
+        RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2**attempt
+    )
+
+
+def should_retry(kind: ErrorKind, nested: bool) -> bool:
+    if kind in PERMANENT_ERRORS:
+        return False
+
+    # transaction has to be built again with the new nonce by the outer call
+    if kind == ErrorKind.nonce and nested:
+        return False
+
+    # in automatic mode unknown errors are retried by Automatic.execute_func_with_retries
+    if kind == ErrorKind.unknown and AUTOMATIC_MODE.get():
+        return False
+
+    return True
 
 
 def retry(func):
+    @wraps(func)
     async def wrapper(*args, **kwargs):
-        retries = 0
-        while retries <= RETRIES:
-            try:
-                result = await func(*args, **kwargs)
-                return result
-            except Exception as e:
-                logger.error(f"Error | {e}")
-                if str(e).startswith("520, "):
-                    logger.error(
-                        f"Probably an rpc error, I am not increasing the retry count"
-                    )
-                else:
-                    retries += 1
-                    if AUTOMATIC_MODE.get():
+        budget = retry_budget.get()
+        nested = budget is not None
+        token = None if nested else retry_budget.set(RetryBudget(RETRY_BUDGET))
+
+        try:
+            retries = 0
+            while retries <= RETRIES:
+                try:
+                    result = await func(*args, **kwargs)
+                    return result
+                except Exception as e:
+                    kind = classify_error(e)
+                    logger.error(f"Error | {kind.value} | {e}")
+
+                    if not should_retry(kind, nested):
+                        raise e
+
+                    if not retry_budget.get().spend():
+                        logger.error("Retry budget is exhausted")
                         raise e
 
-                if ENABLE_ERROR_TRACEBACK:
-                    traceback.print_exc()
+                    retries += 1
+
+                    if ENABLE_ERROR_TRACEBACK:
+                        traceback.print_exc()
 
-                if retries <= RETRIES:
-                    logger.info(f"Retrying... {retries}/{RETRIES}")
-                    await sleep(random.randint(RETRY_DELAY_MIN, RETRY_DELAY_MAX))
+                    if retries <= RETRIES:
+                        delay = get_retry_delay(kind, retries - 1, e)
+                        logger.info(
+                            f"Retrying in {round(delay, 1)} seconds... {retries}/{RETRIES}"
+                        )
+                        await sleep(delay)
+        finally:
+            if token is not None:
+                retry_budget.reset(token)
 
     return wrapper
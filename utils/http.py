@@ -0,0 +1,60 @@
+from typing import Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from settings import HTTP_DNS_CACHE_TTL, HTTP_LIMIT_PER_HOST, HTTP_TIMEOUTS
+from utils.circuit_breaker import guarded_request
+from utils.rate_limiter import limited_request
+
+session: Optional[aiohttp.ClientSession] = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """One connection pool for every http api, dns answers are cached by aiodns resolver"""
+
+    global session
+
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit_per_host=HTTP_LIMIT_PER_HOST,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+                resolver=aiohttp.AsyncResolver(),
+            ),
+            headers={"Accept-Encoding": "gzip, deflate"},
+        )
+
+    return session
+
+
+def get_timeout(url: str) -> aiohttp.ClientTimeout:
+    host = urlparse(url).hostname
+    return aiohttp.ClientTimeout(
+        total=HTTP_TIMEOUTS.get(host, HTTP_TIMEOUTS["default"])
+    )
+
+
+async def request(method: str, url: str, service: Optional[str] = None, **kwargs):
+    """Request through the shared session, paced by the rate limiter of the host"""
+
+    kwargs.setdefault("timeout", get_timeout(url))
+
+    if service is not None:
+        response = await guarded_request(service, get_session(), method, url, **kwargs)
+    else:
+        response = await limited_request(get_session(), method, url, **kwargs)
+
+    # body is kept in the response, connection goes back to the pool
+    await response.read()
+
+    return response
+
+
+async def close_session() -> None:
+    global session
+
+    if session is not None and not session.closed:
+        await session.close()
+
+    session = None
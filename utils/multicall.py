@@ -0,0 +1,83 @@
+import asyncio
+
+from eth_utils.abi import collapse_if_tuple
+from loguru import logger
+from web3 import AsyncWeb3, Web3
+
+from config import MULTICALL_ABI, MULTICALL_CONTRACT
+from settings import MULTICALL_BATCH_SIZE
+
+
+def get_multicall(w3: AsyncWeb3):
+    return w3.eth.contract(
+        address=w3.to_checksum_address(MULTICALL_CONTRACT), abi=MULTICALL_ABI
+    )
+
+
+def _checksum(abi_type: str, value):
+    """Addresses in the same case as call() returns them"""
+
+    if abi_type == "address":
+        return Web3.to_checksum_address(value)
+    if abi_type == "address[]":
+        return [Web3.to_checksum_address(address) for address in value]
+
+    return value
+
+
+def _encode(w3: AsyncWeb3, call) -> str:
+    contract = w3.eth.contract(address=call.address, abi=call.contract_abi)
+
+    return contract.encodeABI(fn_name=call.fn_name, args=call.args)
+
+
+def _decode(w3: AsyncWeb3, call, success: bool, data: bytes):
+    if not success or not data:
+        return None
+
+    output_types = [collapse_if_tuple(output) for output in call.abi["outputs"]]
+
+    try:
+        result = [
+            _checksum(abi_type, value)
+            for abi_type, value in zip(
+                output_types, w3.codec.decode(output_types, data)
+            )
+        ]
+    except Exception as e:
+        logger.debug(f"Can't decode {call.fn_name} result from multicall | {e}")
+        return None
+
+    # same shape as call(): a value for one output, a list for several
+    return result[0] if len(result) == 1 else list(result)
+
+
+async def _aggregate(w3: AsyncWeb3, calls: list) -> list:
+    response = await (
+        get_multicall(w3)
+        .functions.aggregate3(
+            [(call.address, True, _encode(w3, call)) for call in calls]
+        )
+        .call()
+    )
+
+    return [
+        _decode(w3, call, success, data)
+        for call, (success, data) in zip(calls, response)
+    ]
+
+
+async def multicall(w3: AsyncWeb3, calls: list) -> list:
+    """Results of contract calls read in one eth_call per batch, None for the failed ones"""
+
+    if not calls:
+        return []
+
+    batches = await asyncio.gather(
+        *[
+            _aggregate(w3, calls[i : i + MULTICALL_BATCH_SIZE])
+            for i in range(0, len(calls), MULTICALL_BATCH_SIZE)
+        ]
+    )
+
+    return [result for batch in batches for result in batch]
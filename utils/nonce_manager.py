@@ -0,0 +1,47 @@
+import asyncio
+from typing import Optional
+
+# next free nonce for every (chain, address) pair that sent a transaction in this run
+local_nonces = {}
+locks = {}
+
+
+def _get_lock(chain: str, address: str) -> asyncio.Lock:
+    key = (chain, address)
+    if key not in locks:
+        locks[key] = asyncio.Lock()
+    return locks[key]
+
+
+async def get_nonce(w3, chain: str, address: str, reserve: bool = False) -> int:
+    """
+    Next nonce for the address, taking into account transactions that are still in the mempool
+    reserve - hand the nonce out, only right before the transaction is signed and sent
+    """
+
+    key = (chain, address)
+    async with _get_lock(chain, address):
+        pending_nonce = await w3.eth.get_transaction_count(address, "pending")
+        nonce = max(pending_nonce, local_nonces.get(key, 0))
+
+        # the next transaction can be signed before this one is sent, it must not get the same nonce
+        if reserve:
+            local_nonces[key] = nonce + 1
+
+        return nonce
+
+
+def mark_sent(chain: str, address: str, nonce: int) -> None:
+    key = (chain, address)
+    local_nonces[key] = max(local_nonces.get(key, 0), nonce + 1)
+
+
+def reset_nonce(chain: str, address: str, nonce: Optional[int] = None) -> None:
+    """Hands the nonce of a transaction that wasn't sent out again, without it trusts the chain again"""
+
+    key = (chain, address)
+    if nonce is None or key not in local_nonces:
+        local_nonces.pop(key, None)
+        return
+
+    local_nonces[key] = min(local_nonces[key], nonce)
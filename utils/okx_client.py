@@ -0,0 +1,326 @@
+import asyncio
+import base64
+import datetime
+import hmac
+import json
+import os
+import time
+
+import ccxt.async_support as ccxt
+from loguru import logger
+
+from settings import (
+    OKX_FEE_CACHE_FILE,
+    OKX_FEE_CACHE_TTL,
+    OKX_SWEEP_INTERVAL,
+    OKX_WITHDRAWAL_PAGES,
+    OKX_WITHDRAWAL_POLL_MAX,
+    OKX_WITHDRAWAL_POLL_MIN,
+    OKX_WITHDRAWAL_TIMEOUT,
+)
+from utils.errors import FundsNotArrivedError
+from utils.http import request
+
+# api key -> client shared by all accounts, its rate limiter paces every okx request
+clients = {}
+# (time of the update, {"token:chainName": withdrawal fee}), fees are the same for every api key
+fee_table = None
+fee_lock = asyncio.Lock()
+
+
+def get_okx_client(credentials: dict) -> ccxt.okx:
+    key = credentials["apikey"]
+
+    if key not in clients:
+        clients[key] = ccxt.okx(
+            config={
+                "apiKey": credentials["apikey"],
+                "secret": credentials["apisecret"],
+                "password": credentials["passphrase"],
+                "enableRateLimit": True,
+            }
+        )
+
+    return clients[key]
+
+
+def _load_fee_table():
+    if not OKX_FEE_CACHE_FILE or not os.path.exists(OKX_FEE_CACHE_FILE):
+        return None
+
+    try:
+        with open(OKX_FEE_CACHE_FILE) as file:
+            data = json.load(file)
+        return data["updated"], data["fees"]
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Can't read OKX fees from {OKX_FEE_CACHE_FILE} | {e}")
+        return None
+
+
+def _save_fee_table(updated: float, fees: dict) -> None:
+    if not OKX_FEE_CACHE_FILE:
+        return
+
+    try:
+        with open(OKX_FEE_CACHE_FILE, "w") as file:
+            json.dump({"updated": updated, "fees": fees}, file)
+    except OSError as e:
+        logger.warning(f"Can't save OKX fees to {OKX_FEE_CACHE_FILE} | {e}")
+
+
+async def _fetch_fee_table(client: ccxt.okx) -> dict:
+    currencies = await client.fetch_currencies()
+
+    fees = {}
+    for token, currency in currencies.items():
+        for network in (currency.get("networks") or {}).values():
+            fees[f"{token}:{network['id']}"] = network["fee"]
+
+    return fees
+
+
+async def get_withdrawal_fee(
+    client: ccxt.okx, token: str, chain_name: str, refresh: bool = False
+):
+    """Fee from the table built by one fetch_currencies call, refresh after a fee mismatch"""
+
+    global fee_table
+
+    async with fee_lock:
+        if fee_table is None:
+            fee_table = _load_fee_table()
+
+        updated, fees = fee_table or (0, {})
+
+        if refresh or time.time() - updated > OKX_FEE_CACHE_TTL:
+            fees = await _fetch_fee_table(client)
+            updated = time.time()
+            fee_table = (updated, fees)
+            _save_fee_table(updated, fees)
+
+    fee = fees.get(f"{token}:{chain_name}")
+    if fee is None:
+        raise ValueError(
+            f"Couldn't get the withdrawal fee for {token=} and {chain_name=}"
+        )
+
+    return fee
+
+
+# api key -> {withdrawal id: future resolved when the withdrawal is done}
+pending_withdrawals = {}
+pollers = {}
+
+WITHDRAWALS_PAGE_SIZE = 100
+# ccxt statuses of withdrawals that will never be done, unknown okx states stay pending
+FAILED_STATUSES = ("failed", "canceled")
+
+
+async def _fetch_pending_statuses(client: ccxt.okx, pending: dict) -> dict:
+    """Statuses of pending withdrawals from as few pages of the history as possible"""
+
+    statuses = {}
+    params = {}
+
+    for _ in range(OKX_WITHDRAWAL_PAGES):
+        withdrawals = await client.fetch_withdrawals(
+            limit=WITHDRAWALS_PAGE_SIZE, params=params
+        )
+        for withdrawal in withdrawals:
+            if withdrawal["id"] in pending:
+                statuses[withdrawal["id"]] = withdrawal
+
+        if len(statuses) == len(pending) or len(withdrawals) < WITHDRAWALS_PAGE_SIZE:
+            break
+
+        # next page is older than the oldest withdrawal of this one
+        params = {"after": min(w["timestamp"] for w in withdrawals)}
+
+    # older than the pages looked through, asked one by one
+    missing = [wd_id for wd_id in pending if wd_id not in statuses]
+    withdrawals = await asyncio.gather(
+        *[client.fetch_withdrawal(wd_id) for wd_id in missing],
+        return_exceptions=True,
+    )
+    for wd_id, withdrawal in zip(missing, withdrawals):
+        if isinstance(withdrawal, Exception):
+            logger.warning(f"OKX withdrawal {wd_id} request failed | {withdrawal}")
+            continue
+        statuses[wd_id] = withdrawal
+
+    return statuses
+
+
+async def _poll_withdrawals(client: ccxt.okx) -> None:
+    pending = pending_withdrawals[client.apiKey]
+
+    while pending:
+        try:
+            statuses = await _fetch_pending_statuses(client, pending)
+        except Exception as e:
+            logger.warning(f"OKX withdrawals history request failed | {e}")
+            statuses = {}
+
+        for wd_id, withdrawal in statuses.items():
+            status = withdrawal["status"]
+            if status != "ok" and status not in FAILED_STATUSES:
+                if status != "pending":
+                    logger.debug(f"OKX withdrawal {wd_id} is {status}, still waiting")
+                continue
+
+            # waiter might have given up meanwhile
+            future = pending.pop(wd_id, None)
+            if future is None or future.done():
+                continue
+
+            if status == "ok":
+                future.set_result(withdrawal)
+            else:
+                future.set_exception(
+                    ValueError(f"OKX Withdraw {status} | response: {withdrawal}")
+                )
+
+        logger.debug(f"OKX withdrawals pending: {len(pending)}")
+
+        # one request checks all of them, so few pending withdrawals are checked often
+        await asyncio.sleep(
+            min(OKX_WITHDRAWAL_POLL_MAX, OKX_WITHDRAWAL_POLL_MIN * len(pending))
+        )
+
+
+async def wait_for_withdrawal(client: ccxt.okx, wd_id: str) -> dict:
+    """Resolved by one poller per api key, however many accounts wait"""
+
+    pending = pending_withdrawals.setdefault(client.apiKey, {})
+    if wd_id not in pending:
+        pending[wd_id] = asyncio.get_running_loop().create_future()
+
+    future = pending[wd_id]
+
+    poller = pollers.get(client.apiKey)
+    if poller is None or poller.done():
+        pollers[client.apiKey] = asyncio.create_task(
+            _poll_withdrawals(client), name="okx withdrawals"
+        )
+
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), OKX_WITHDRAWAL_TIMEOUT)
+    except asyncio.TimeoutError:
+        pending.pop(wd_id, None)
+        # the withdrawal is sent already, a retry would withdraw again
+        raise FundsNotArrivedError(
+            f"OKX withdrawal {wd_id} isn't done in {OKX_WITHDRAWAL_TIMEOUT} seconds"
+        )
+
+
+OKX_API_URL = "https://www.okx.cab"
+
+# api key -> (time of the last sweep, sweep in progress)
+sweeps = {}
+
+
+def get_signed_headers(credentials: dict, method: str, path: str, body: str = ""):
+    dt_now = datetime.datetime.utcnow()
+    timestamp = f"{dt_now:%Y-%m-%dT%H:%M:%S}.{str(dt_now.microsecond).zfill(6)[:3]}Z"
+
+    message = timestamp + method.upper() + path + body
+    mac = hmac.new(
+        bytes(credentials["apisecret"], encoding="utf-8"),
+        bytes(message, encoding="utf-8"),
+        digestmod="sha256",
+    )
+
+    return {
+        "Content-Type": "application/json",
+        "OK-ACCESS-KEY": credentials["apikey"],
+        "OK-ACCESS-SIGN": base64.b64encode(mac.digest()).decode("utf-8"),
+        "OK-ACCESS-TIMESTAMP": timestamp,
+        "OK-ACCESS-PASSPHRASE": credentials["passphrase"],
+        "x-simulated-trading": "0",
+    }
+
+
+async def okx_request(credentials: dict, method: str, path: str, body=None) -> dict:
+    body = json.dumps(body) if body is not None else ""
+
+    response = await request(
+        method,
+        OKX_API_URL + path,
+        headers=get_signed_headers(credentials, method, path, body),
+        data=body or None,
+    )
+
+    return await response.json()
+
+
+async def _get_subaccount_balance(credentials: dict, name: str) -> float:
+    data = await okx_request(
+        credentials,
+        "GET",
+        f"/api/v5/asset/subaccount/balances?subAcct={name}&ccy=ETH",
+    )
+
+    balances = data.get("data") or []
+    return float(balances[0]["availBal"]) if balances else 0
+
+
+async def _sweep_subaccounts(credentials: dict) -> None:
+    subaccounts = await okx_request(credentials, "GET", "/api/v5/users/subaccount/list")
+    names = [subaccount["subAcct"] for subaccount in subaccounts.get("data") or []]
+
+    # requests are paced by the rate limiter of the okx host
+    balances = await asyncio.gather(
+        *[_get_subaccount_balance(credentials, name) for name in names],
+        return_exceptions=True,
+    )
+
+    for name, balance in zip(names, balances):
+        if isinstance(balance, Exception):
+            logger.error(f"OKX {name} | Couldn't get ETH balance: {balance}")
+            continue
+        if not balance:
+            continue
+
+        logger.info(f"OKX {name} | Transferring {balance} ETH to the main account")
+
+        response = await okx_request(
+            credentials,
+            "POST",
+            "/api/v5/asset/transfer",
+            {
+                "ccy": "ETH",
+                "amt": str(balance),
+                "from": "6",
+                "to": "6",
+                "type": "2",
+                "subAcct": name,
+            },
+        )
+        if response.get("code") != "0":
+            logger.error(f"OKX {name} | Transfer failed: {response}")
+
+
+async def sweep_subaccounts(credentials: dict) -> None:
+    """Moves ETH from sub-accounts to the main account, once for a batch of withdrawals"""
+
+    key = credentials["apikey"]
+    last_sweep, in_progress = sweeps.get(key, (0, None))
+
+    if in_progress is None or in_progress.done():
+        if time.time() - last_sweep < OKX_SWEEP_INTERVAL:
+            return
+
+        in_progress = asyncio.ensure_future(_sweep_subaccounts(credentials))
+        sweeps[key] = (time.time(), in_progress)
+
+    await asyncio.shield(in_progress)
+
+
+async def close_okx_clients() -> None:
+    for poller in pollers.values():
+        poller.cancel()
+
+    for client in clients.values():
+        await client.close()
+
+    clients.clear()
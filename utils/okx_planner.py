@@ -0,0 +1,54 @@
+import asyncio
+from typing import Optional
+
+from loguru import logger
+
+from settings import OKX_WITHDRAWALS_PER_SECOND
+from utils.rate_limiter import TokenBucket
+
+# address -> withdrawal sent ahead for the account, resolved when funds are withdrawn
+planned = {}
+# addresses whose withdrawal reached okx, a failed one must not be sent again
+submitted = set()
+bucket: Optional[TokenBucket] = None
+
+
+def _log_failure(address: str, future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(
+            f"[{address}] Planned OKX withdrawal failed | {future.exception()}"
+        )
+
+
+async def _submit(submit):
+    global bucket
+
+    if bucket is None:
+        bucket = TokenBucket(OKX_WITHDRAWALS_PER_SECOND, capacity=1)
+
+    await bucket.acquire()
+
+    return await submit()
+
+
+def plan_withdrawal(address: str, submit) -> None:
+    """submit - coroutine function that withdraws to the address and waits until it's done"""
+
+    if address in planned:
+        return
+
+    future = asyncio.ensure_future(_submit(submit))
+    future.add_done_callback(lambda f: _log_failure(address, f))
+    planned[address] = future
+
+
+def take_planned_withdrawal(address: str) -> Optional[asyncio.Future]:
+    return planned.pop(address, None)
+
+
+def mark_submitted(address: str) -> None:
+    submitted.add(address)
+
+
+def is_submitted(address: str) -> bool:
+    return address in submitted
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from settings import RATE_LIMITS, RATE_LIMIT_RETRIES
+
+limiters = {}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        """Server said we are too fast: pause and halve the rate"""
+
+        pause = retry_after if retry_after is not None else 1 / self.rate
+        self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+        self.rate = max(self.max_rate / 16, self.rate / 2)
+        self.tokens = 0
+
+    def recover(self) -> None:
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+def get_limiter(url: str) -> TokenBucket:
+    host = urlparse(url).hostname or url
+
+    if host not in limiters:
+        limiters[host] = TokenBucket(RATE_LIMITS.get(host, RATE_LIMITS["default"]))
+
+    return limiters[host]
+
+
+def get_retry_after(headers) -> Optional[float]:
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def limited_request(session, method: str, url: str, **kwargs):
+    """aiohttp request paced by the token bucket of the host"""
+
+    limiter = get_limiter(url)
+
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        await limiter.acquire()
+
+        response = await session.request(method, url, **kwargs)
+        if response.status != 429:
+            limiter.recover()
+            return response
+
+        logger.warning(f"Rate limited by {urlparse(url).hostname}, slowing down")
+        limiter.throttle(get_retry_after(response.headers))
+
+        if attempt < RATE_LIMIT_RETRIES:
+            response.release()
+
+    return response
@@ -0,0 +1,382 @@
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from copy import deepcopy
+from typing import Optional
+
+from hexbytes import HexBytes
+from loguru import logger
+from web3 import AsyncWeb3, Web3
+from web3.middleware import async_geth_poa_middleware
+
+from config import RPC
+from utils.rate_limiter import get_limiter, get_retry_after
+from settings import (
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    HEDGE_READ_REQUESTS,
+    RATE_LIMIT_RETRIES,
+    RPC_BLOCK_CACHE,
+    RPC_BLOCK_CACHE_FUNCTIONS,
+)
+
+web3_clients = {}
+background_tasks = set()
+
+in_flight = {}
+chain_ids = {}
+
+# block number of a chain is refreshed at most once per BLOCK_NUMBER_TTL seconds
+BLOCK_NUMBER_TTL = 1
+block_numbers = {}
+block_cache = {}
+block_cache_selectors = {
+    Web3.keccak(text=function)[:4].hex() for function in RPC_BLOCK_CACHE_FUNCTIONS
+}
+
+endpoint_chains = {
+    endpoint: chain for chain, data in RPC.items() for endpoint in data["rpc"]
+}
+
+READ_METHODS = {
+    "eth_blockNumber",
+    "eth_call",
+    "eth_chainId",
+    "eth_estimateGas",
+    "eth_feeHistory",
+    "eth_gasPrice",
+    "eth_getBalance",
+    "eth_getBlockByNumber",
+    "eth_getCode",
+    "eth_getTransactionByHash",
+    "eth_maxPriorityFeePerGas",
+}
+
+# endpoint -> how many times it was the first one to accept a transaction
+first_accepted = {}
+
+ALREADY_KNOWN_ERRORS = (
+    "already known",
+    "known transaction",
+    "already imported",
+    "transaction already exists",
+)
+
+
+class EndpointStats:
+    def __init__(self) -> None:
+        self.latencies = deque(maxlen=200)
+        # latencies measured in the whole run, the deque keeps only the latest ones
+        self.samples = 0
+        self.requests = 0
+        self.errors = 0
+
+    def add_latency(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.samples += 1
+
+    def percentile(self, percent: int, latest=None) -> Optional[float]:
+        """latest - only this many of the latest latencies"""
+
+        latencies = list(self.latencies)
+        if latest is not None:
+            latencies = latencies[len(latencies) - min(latest, len(latencies)) :]
+
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return None
+
+        latencies = sorted(latencies)
+        return latencies[min(len(latencies) - 1, len(latencies) * percent // 100)]
+
+
+endpoint_stats = {}
+
+hedge_stats = {
+    "requests": 0,  # read requests that could be hedged
+    "fired": 0,  # requests sent to a second endpoint
+    "won": 0,  # hedges that answered before the primary endpoint
+    "saved": 0.0,  # seconds saved by the hedges that won
+}
+
+
+# set in hedge requests sent to a backup endpoint
+is_hedge: ContextVar[bool] = ContextVar("is_hedge", default=False)
+
+
+def get_stats(endpoint: str) -> EndpointStats:
+    if endpoint not in endpoint_stats:
+        endpoint_stats[endpoint] = EndpointStats()
+
+    return endpoint_stats[endpoint]
+
+
+async def _timed_request(endpoint: str, make_request, method, params):
+    stats = get_stats(endpoint)
+    limiter = get_limiter(endpoint)
+
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        await limiter.acquire()
+
+        stats.requests += 1
+        start_time = time.monotonic()
+
+        try:
+            response = await make_request(method, params)
+        except Exception as e:
+            stats.errors += 1
+            if getattr(e, "status", None) != 429 or attempt == RATE_LIMIT_RETRIES:
+                raise e
+
+            logger.warning(f"Rate limited by {endpoint}, slowing down")
+            limiter.throttle(get_retry_after(getattr(e, "headers", None) or {}))
+            continue
+
+        limiter.recover()
+        stats.add_latency(time.monotonic() - start_time)
+
+        return response
+
+
+async def _singleflight(key, request):
+    """Callers asking the same thing at the same time share one network request"""
+
+    if key in in_flight:
+        return deepcopy(await asyncio.shield(in_flight[key]))
+
+    future = asyncio.ensure_future(request())
+    in_flight[key] = future
+    try:
+        return deepcopy(await asyncio.shield(future))
+    finally:
+        in_flight.pop(key, None)
+
+
+def _is_block_cacheable(method, params) -> bool:
+    if not RPC_BLOCK_CACHE or method != "eth_call":
+        return False
+
+    transaction, block = params[0], params[1] if len(params) > 1 else "latest"
+
+    return (
+        block == "latest"
+        and "from" not in transaction
+        and transaction.get("data", "")[:10] in block_cache_selectors
+    )
+
+
+async def rpc_middleware(make_request, w3):
+    endpoint = w3.provider.endpoint_uri
+    chain = endpoint_chains.get(endpoint, endpoint)
+
+    async def read_request(method, params):
+        if not HEDGE_READ_REQUESTS:
+            return await _timed_request(endpoint, make_request, method, params)
+
+        return await _hedged_request(endpoint, make_request, method, params)
+
+    async def get_block_number():
+        cached = block_numbers.get(chain)
+        if cached is not None and time.monotonic() - cached[1] < BLOCK_NUMBER_TTL:
+            return cached[0]
+
+        response = await _singleflight(
+            (chain, "eth_blockNumber", "[]"),
+            lambda: read_request("eth_blockNumber", []),
+        )
+        block_numbers[chain] = (response["result"], time.monotonic())
+
+        return response["result"]
+
+    async def middleware(method, params):
+        # a hedge joining the in flight request of the slow endpoint would wait for it
+        if method not in READ_METHODS or is_hedge.get():
+            return await _timed_request(endpoint, make_request, method, params)
+
+        if method == "eth_chainId" and chain in chain_ids:
+            return deepcopy(chain_ids[chain])
+
+        key = (chain, method, json.dumps(params, sort_keys=True, default=str))
+
+        if _is_block_cacheable(method, params):
+            block_number = await get_block_number()
+            cached = block_cache.get(key)
+            if cached is not None and cached[0] == block_number:
+                return deepcopy(cached[1])
+
+            response = await _singleflight(key, lambda: read_request(method, params))
+            if "error" not in response:
+                block_cache[key] = (block_number, response)
+
+            return response
+
+        response = await _singleflight(key, lambda: read_request(method, params))
+
+        if method == "eth_chainId" and "error" not in response:
+            chain_ids[chain] = response
+
+        return response
+
+    return middleware
+
+
+async def _backup_request(endpoint: str, method, params):
+    """Request through the middleware of the backup endpoint, answer of the same shape as the primary one"""
+
+    is_hedge.set(True)
+    result = await get_web3(endpoint).manager.coro_request(method, params)
+
+    return {"jsonrpc": "2.0", "id": 0, "result": result}
+
+
+async def _hedged_request(endpoint: str, make_request, method, params):
+    """If the endpoint is slower than its usual p90, ask another one and take the first answer"""
+
+    chain = endpoint_chains.get(endpoint)
+    backups = [e for e in RPC[chain]["rpc"] if e != endpoint] if chain else []
+    delay = get_stats(endpoint).percentile(HEDGE_PERCENTILE)
+
+    if not backups or delay is None:
+        return await _timed_request(endpoint, make_request, method, params)
+
+    hedge_stats["requests"] += 1
+
+    primary = asyncio.ensure_future(
+        _timed_request(endpoint, make_request, method, params)
+    )
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+
+    backup_endpoint = random.choice(backups)
+    hedge = asyncio.ensure_future(_backup_request(backup_endpoint, method, params))
+    hedge_stats["fired"] += 1
+
+    pending = {primary, hedge}
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        winner = done.pop()
+        if winner.exception() is not None and pending:
+            continue
+
+        if winner is hedge and pending:
+            hedge_stats["won"] += 1
+            hedge_time = time.monotonic()
+            primary.add_done_callback(
+                lambda _: hedge_stats.update(
+                    saved=hedge_stats["saved"] + time.monotonic() - hedge_time
+                )
+            )
+
+        # the loser finishes in background so its latency is still measured
+        for task in pending:
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+        return winner.result()
+
+
+def get_web3(endpoint: str) -> AsyncWeb3:
+    if endpoint not in web3_clients:
+        web3_clients[endpoint] = AsyncWeb3(
+            AsyncWeb3.AsyncHTTPProvider(endpoint),
+            middlewares=[async_geth_poa_middleware, rpc_middleware],
+        )
+
+    return web3_clients[endpoint]
+
+
+def snapshot_stats() -> dict:
+    """endpoint -> requests, errors and latencies measured so far"""
+
+    return {
+        endpoint: (stats.requests, stats.errors, stats.samples)
+        for endpoint, stats in endpoint_stats.items()
+    }
+
+
+def get_chain_stats(since: dict) -> dict:
+    """chain -> requests, errors and the worst p90 latency of its endpoints after the snapshot"""
+
+    chains = {}
+    for endpoint, stats in endpoint_stats.items():
+        chain = endpoint_chains.get(endpoint, endpoint)
+        prev_requests, prev_errors, prev_samples = since.get(endpoint, (0, 0, 0))
+
+        requests, errors, latency = chains.get(chain, (0, 0, None))
+        p90 = stats.percentile(90, latest=stats.samples - prev_samples)
+        if latency is None or (p90 is not None and p90 > latency):
+            latency = p90
+        chains[chain] = (
+            requests + stats.requests - prev_requests,
+            errors + stats.errors - prev_errors,
+            latency,
+        )
+
+    return chains
+
+
+def log_rpc_stats() -> None:
+    for endpoint, stats in endpoint_stats.items():
+        logger.info(
+            f"RPC {endpoint} | requests: {stats.requests} | errors: {stats.errors} | "
+            + f"p50: {stats.percentile(50)} | p90: {stats.percentile(90)}"
+        )
+
+    if hedge_stats["fired"]:
+        logger.info(
+            f"Hedged requests | fired: {hedge_stats['fired']}/{hedge_stats['requests']} | "
+            + f"won: {hedge_stats['won']} | saved: {round(hedge_stats['saved'], 2)} seconds"
+        )
+
+    for endpoint, count in sorted(first_accepted.items(), key=lambda x: -x[1]):
+        logger.info(f"RPC {endpoint} | accepted transactions first: {count}")
+
+
+def is_already_known(error: Exception) -> bool:
+    return any(message in str(error).lower() for message in ALREADY_KNOWN_ERRORS)
+
+
+async def _send_raw_transaction(endpoint: str, raw_transaction: bytes) -> str:
+    try:
+        await get_web3(endpoint).eth.send_raw_transaction(raw_transaction)
+    except Exception as e:
+        # transaction came to this node from another one faster than from us
+        if not is_already_known(e):
+            raise e
+
+    return endpoint
+
+
+async def broadcast_raw_transaction(chain: str, raw_transaction: bytes) -> HexBytes:
+    """Send signed transaction to every rpc of the chain, the first node that accepts it wins"""
+
+    txn_hash = Web3.keccak(raw_transaction)
+
+    tasks = [
+        asyncio.create_task(_send_raw_transaction(endpoint, raw_transaction))
+        for endpoint in RPC[chain]["rpc"]
+    ]
+    # other endpoints keep broadcasting in background
+    for task in tasks:
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    error = None
+    for future in asyncio.as_completed(tasks):
+        try:
+            endpoint = await future
+        except Exception as e:
+            error = error or e
+            continue
+
+        first_accepted[endpoint] = first_accepted.get(endpoint, 0) + 1
+        logger.debug(f"{txn_hash.hex()} accepted first by {endpoint}")
+
+        return txn_hash
+
+    raise error
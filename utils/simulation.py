@@ -0,0 +1,127 @@
+from typing import Optional
+
+from eth_abi import abi
+from eth_utils.abi import collapse_if_tuple, function_abi_to_4byte_selector
+from loguru import logger
+from web3 import AsyncWeb3
+
+import config
+from utils.errors import ErrorKind, RevertError, classify_revert
+
+ERROR_SELECTOR = "0x08c379a0"  # Error(string)
+PANIC_SELECTOR = "0x4e487b71"  # Panic(uint256)
+
+
+def _load_custom_errors() -> dict:
+    """Selector -> error of every abi in config"""
+
+    errors = {}
+    for name, contract_abi in vars(config).items():
+        if not name.endswith("_ABI") or not isinstance(contract_abi, list):
+            continue
+
+        for item in contract_abi:
+            if item.get("type") == "error":
+                # errors are selected the same way as functions
+                errors["0x" + function_abi_to_4byte_selector(item).hex()] = item
+
+    return errors
+
+
+custom_errors = _load_custom_errors()
+
+
+def decode_revert_data(data) -> Optional[str]:
+    if isinstance(data, bytes):
+        data = "0x" + data.hex()
+    if not isinstance(data, str) or not data.startswith("0x") or len(data) < 10:
+        return None
+
+    selector, payload = data[:10].lower(), bytes.fromhex(data[10:])
+
+    try:
+        if selector == ERROR_SELECTOR:
+            return abi.decode(["string"], payload)[0]
+        if selector == PANIC_SELECTOR:
+            return f"panic {hex(abi.decode(['uint256'], payload)[0])}"
+
+        error = custom_errors.get(selector)
+        if error is not None:
+            args = abi.decode(
+                [collapse_if_tuple(arg) for arg in error["inputs"]], payload
+            )
+            return f"{error['name']}{tuple(args)}"
+    except Exception:
+        pass
+
+    return f"unknown error {selector}"
+
+
+def _revert_data(error: Exception):
+    data = getattr(error, "data", None)
+    if data is None and error.args and isinstance(error.args[0], dict):
+        data = error.args[0].get("data")
+
+    return data
+
+
+def get_revert_reason(error: Exception) -> Optional[str]:
+    """Decoded reason if the error is a revert, None for rpc and other errors"""
+
+    reason = decode_revert_data(_revert_data(error))
+    if reason is not None:
+        return reason
+
+    message = str(error)
+    if "execution reverted" in message.lower():
+        return message
+
+    return None
+
+
+def explain_estimate_error(error: Exception) -> Exception:
+    """Gas estimation revert is final only with revert data, a bare one can be a node failure"""
+
+    reason = decode_revert_data(_revert_data(error))
+    if reason is not None:
+        return RevertError(reason, classify_revert(reason))
+
+    if get_revert_reason(error) is not None:
+        return RevertError(str(error), ErrorKind.unknown)
+
+    return error
+
+
+async def simulate(w3: AsyncWeb3, transaction: dict) -> None:
+    """Runs the built transaction with eth_call on the pending block, only reverts are raised"""
+
+    try:
+        await w3.eth.call(transaction, "pending")
+    except Exception as e:
+        reason = get_revert_reason(e)
+        if reason is None:
+            # rpc without pending block support or a network error, estimate_gas still checks it
+            logger.debug(f"Transaction simulation skipped | {e}")
+            return
+
+        raise RevertError(reason, classify_revert(reason)) from e
+
+
+async def explain_failure(
+    w3: AsyncWeb3, transaction: Optional[dict], block_number: int, message: str
+) -> Exception:
+    """Error for a transaction that failed on chain, with the reason from its replay"""
+
+    if transaction is None:
+        return Exception(message)
+
+    try:
+        # state its block started from, later blocks might have changed it again
+        await w3.eth.call(transaction, block_number - 1)
+    except Exception as e:
+        reason = get_revert_reason(e)
+        if reason is not None:
+            return RevertError(f"{reason} | {message}", classify_revert(reason))
+
+    # passes in the state before its block, it might pass if sent again
+    return Exception(message)